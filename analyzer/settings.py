@@ -44,19 +44,38 @@ INSTALLED_APPS = [
     
     # third party apps
     'corsheaders',
-    'drf_spectacular',
     
     # local apps
     'base',
 ]
 
+# API documentation (/schema, /docs and /). drf_spectacular is imported by
+# the first docs request and the schema is generated once per process;
+# API_SCHEMA_FILE serves one written at build time with
+# `python manage.py spectacular --file schema.yml` instead. Turn the docs
+# off to leave drf_spectacular out entirely.
+API_DOCS_ENABLED = os.getenv('API_DOCS_ENABLED', 'True') == 'True'
+
+API_SCHEMA_FILE = os.getenv('API_SCHEMA_FILE', '')
+
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.append('drf_spectacular')
+
+SPECTACULAR_SETTINGS = {
+    'DEFAULT_GENERATOR_CLASS': 'base.schema.SchemaGenerator'
+}
+
 MIDDLEWARE = [
+    'base.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request, query and stage timings exposed on /metrics (see base.metrics)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+
 ROOT_URLCONF = 'analyzer.urls'
 
 TEMPLATES = [
@@ -84,9 +103,75 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # a file, not the in-memory default: the concurrency tests give each
+        # thread its own connection, which a shared in-memory database
+        # rejects with "database table is locked"
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+# PRAGMAs run on every new SQLite connection (see base.db)
+SQLITE_PRAGMAS = {}
+
+# DATABASE_PROFILE=concurrent tunes SQLite for many concurrent writers:
+# WAL lets readers run alongside the writer, IMMEDIATE transactions take
+# the write lock up front so two transactions never deadlock upgrading a
+# read lock (the source of "database is locked"), the busy timeout makes
+# writers queue instead of failing, and connections are reused across
+# requests.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'default')
+
+if DATABASE_PROFILE == 'concurrent':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'mmap_size': 256 * 1024 * 1024,
+        # negative: size in KiB rather than pages
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
     }
+
+
+# Cache
+# Shared by every worker process on the host so rate limits are global.
+
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'base.cache.SQLiteCache',
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {
+            'TABLE': 'ratelimit',
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    'responses': {
+        'BACKEND': 'base.cache.SQLiteCache',
+        'LOCATION': CACHE_LOCATION,
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'TABLE': 'responses',
+            'MAX_ENTRIES': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
 }
 
+RATELIMIT_USE_CACHE = 'default'
+
+RATELIMIT_ENABLE = os.getenv('RATELIMIT_ENABLE', 'True') == 'True'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +209,8 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -131,11 +218,50 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer'
+        'base.renderers.FastJSONRenderer'
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
-}
\ No newline at end of file
+}
+
+# Strings list pagination and streaming
+
+STRINGS_PAGE_SIZE = int(os.getenv('STRINGS_PAGE_SIZE', 100))
+
+STRINGS_MAX_PAGE_SIZE = int(os.getenv('STRINGS_MAX_PAGE_SIZE', 1000))
+
+STRINGS_STREAM_CHUNK_SIZE = int(os.getenv('STRINGS_STREAM_CHUNK_SIZE', 2000))
+
+STRINGS_BATCH_MAX_SIZE = int(os.getenv('STRINGS_BATCH_MAX_SIZE', 50000))
+
+# In-process cache of list results, bounded by the total number of rows it
+# holds; 0 disables it
+STRINGS_LIST_CACHE_ROWS = int(os.getenv('STRINGS_LIST_CACHE_ROWS', 50000))
+
+# Natural language results with more rows than this are not written to the
+# shared response cache
+STRINGS_NL_CACHE_MAX_ROWS = int(os.getenv('STRINGS_NL_CACHE_MAX_ROWS', 1000))
+
+
+# String analysis (see base.executors): inline in the request thread, or in
+# a 'thread' or 'process' pool of ANALYSIS_WORKERS (0: one per CPU). At most
+# ANALYSIS_QUEUE_SIZE analyses wait or run at once per process; past that a
+# request waits ANALYSIS_QUEUE_TIMEOUT seconds for a slot, then gets a 503.
+
+ANALYSIS_EXECUTOR = os.getenv('ANALYSIS_EXECUTOR', 'inline')
+
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 0))
+
+ANALYSIS_QUEUE_SIZE = int(os.getenv('ANALYSIS_QUEUE_SIZE', 64))
+
+ANALYSIS_QUEUE_TIMEOUT = float(os.getenv('ANALYSIS_QUEUE_TIMEOUT', 1))
+
+
+# Large documents
+
+DOCUMENTS_MAX_BYTES = int(os.getenv('DOCUMENTS_MAX_BYTES', 256 * 1024 * 1024))
+
+DOCUMENTS_CHUNK_SIZE = int(os.getenv('DOCUMENTS_CHUNK_SIZE', 64 * 1024))
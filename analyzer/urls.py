@@ -1,14 +1,44 @@
+from django.conf import settings
 from django.urls import path
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
-from base.views import ListCreateStringView, NaturalLanguageFilterView, RetrieveDeleteView
+from base.async_views import (
+    list_create_strings,
+    natural_language_filter,
+    retrieve_string
+)
+from base.docs import lazy_view
+from base.views import (
+    BatchCreateStringView,
+    DocumentCreateView,
+    DocumentRetrieveDeleteView,
+    ListCreateStringView,
+    NaturalLanguageFilterView,
+    RetrieveDeleteView,
+    StringStatsView,
+    metrics_view
+)
 
 
 urlpatterns = [
-    path('schema', SpectacularAPIView.as_view(), name='schema'),
-    path('docs', SpectacularSwaggerView.as_view(url_name='schema'), name='spectacular-doc'),
-    path('', SpectacularSwaggerView.as_view(url_name='schema'), name='spectacular-doc'),
+    path('metrics', metrics_view, name='metrics'),
     path('strings', ListCreateStringView.as_view(), name='list-create-strings'),
+    path('strings/batch', BatchCreateStringView.as_view(), name='batch-create-strings'),
     path('strings/filter-by-natural-language', NaturalLanguageFilterView.as_view(), name='natural-language-filter-strings-search'),
-    path('strings/<str:string_value>', RetrieveDeleteView.as_view(), name='retrieve-delete-string')
+    path('strings/stats', StringStatsView.as_view(), name='string-stats'),
+    path('strings/<str:string_value>', RetrieveDeleteView.as_view(), name='retrieve-delete-string'),
+    path('documents', DocumentCreateView.as_view(), name='create-document'),
+    path('documents/<str:document_id>', DocumentRetrieveDeleteView.as_view(), name='retrieve-delete-document'),
+    path('async/strings', list_create_strings, name='async-list-create-strings'),
+    path('async/strings/filter-by-natural-language', natural_language_filter, name='async-natural-language-filter-strings-search'),
+    path('async/strings/<str:string_value>', retrieve_string, name='async-retrieve-string')
 ]
+
+# drf_spectacular is only imported by the first docs request
+if settings.API_DOCS_ENABLED:
+    swagger_view = lazy_view(
+        'drf_spectacular.views.SpectacularSwaggerView', url_name='schema')
+    urlpatterns += [
+        path('schema', lazy_view('base.schema_views.SchemaView'), name='schema'),
+        path('docs', swagger_view, name='spectacular-doc'),
+        path('', swagger_view, name='spectacular-doc'),
+    ]
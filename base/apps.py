@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
 
 
 class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'base'
+
+    def ready(self):
+        from .db import set_sqlite_pragmas
+        from . import executors, metrics
+
+        connection_created.connect(set_sqlite_pragmas)
+        metrics.configure()
+        setting_changed.connect(metrics.configure)
+        connection_created.connect(metrics.install_query_hook)
+        setting_changed.connect(executors.reset)
@@ -0,0 +1,270 @@
+"""
+Async versions of the string endpoints, for ASGI servers.
+
+The DRF views in base.views are synchronous, so under an ASGI server every
+request to them is handed to a worker thread. These views run on the event
+loop and read through Django's async ORM; only the parts without an async
+counterpart (the rate limit counter and the create transaction) are sent to
+a thread. Rate limits are counted in the same groups as the sync views, so
+a client gets one limit whichever path it calls.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+from django_ratelimit.core import is_ratelimited
+from functools import wraps
+from rest_framework.exceptions import APIException, NotFound, ParseError
+
+import json
+
+from .analysis import sha256_hash
+from .cache import RESPONSE_CACHE, get_string, query_cache_key, set_string
+from .exceptions import InvalidQueryParamsException, MissingValueException
+from .filters import StringsFilter, filter_strings
+from .metrics import timer
+from .models import String, StringStatistic
+from .pagination import KeysetPagination
+from .query_parser import parse_query
+from .renderers import dumps
+from .serializers import StringProjection, StringSerializer
+from .utils import etag_matches, parse_bool, string_etag
+from .views import (
+    ListCreateStringView,
+    NaturalLanguageFilterView,
+    RetrieveDeleteView
+)
+
+
+def json_response(data, status=200, headers=None):
+    """
+    JSON response encoded like FastJSONRenderer.
+    """
+    return HttpResponse(
+        dumps(data),
+        status=status,
+        headers=headers,
+        content_type='application/json',
+    )
+
+
+def ratelimit_group(view_class):
+    """
+    Rate limit group django_ratelimit derives for the dispatch() of a sync
+    view decorated with method_decorator(ratelimit).
+    """
+    dispatch = view_class.dispatch
+    return '.'.join([dispatch.__module__, view_class.__name__, dispatch.__qualname__])
+
+
+def async_api_view(view_class, key='ip', rate='50/h'):
+    """
+    Rate limit an async view in the group of view_class and render the
+    APIExceptions it raises the way DRF does.
+    """
+    group = ratelimit_group(view_class)
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            limited = await sync_to_async(is_ratelimited)(
+                request, group=group, key=key, rate=rate, increment=True)
+            if limited:
+                return JsonResponse({
+                    'detail': 'Too many requests.'
+                }, status=429)
+            try:
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                # as DRF's exception handler does for throttling and 503s
+                wait = getattr(exc, 'wait', None)
+                headers = {'Retry-After': '%d' % wait} if wait else None
+                return json_response(
+                    {'detail': exc.detail}, status=exc.status_code, headers=headers)
+        return wrapper
+    return decorator
+
+
+def stream(queryset, projection):
+    """
+    Stream the queryset as NDJSON from an async iterator, one serialized
+    string per line.
+    """
+    chunk_size = getattr(settings, 'STRINGS_STREAM_CHUNK_SIZE', 2000)
+
+    async def rows():
+        rows = projection.rows(queryset).aiterator(chunk_size=chunk_size)
+        async for row in rows:
+            yield dumps(projection.represent(row)) + b'\n'
+
+    return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+
+
+def create(payload, upsert):
+    serializer = StringSerializer(data=payload, context={'upsert': upsert})
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return serializer.data, serializer.created
+
+
+async def list_count(qs, applied_filters, exact):
+    with timer('count'):
+        result = await sync_to_async(StringStatistic.count_filtered)(
+            applied_filters, exact)
+        if result is None:
+            result = await qs.acount(), True
+    return result
+
+
+async def list_result(request, qs, projection, applied_filters):
+    exact = parse_bool(request.GET.get('exact'), default=True)
+    if parse_bool(request.GET.get('count_only')):
+        count, exact = await list_count(qs, applied_filters, exact)
+        return {
+            'data': [],
+            'count': count,
+            'count_exact': exact,
+            'filters_applied': applied_filters
+        }
+
+    paginator = KeysetPagination()
+    if not paginator.is_requested(request):
+        with timer('query'):
+            rows = [row async for row in projection.rows(qs)]
+        with timer('serialize'):
+            data = [projection.represent(row) for row in rows]
+        return {
+            'data': data,
+            'count': len(data),
+            'filters_applied': applied_filters
+        }
+
+    with timer('query'):
+        page = await paginator.apaginate_queryset(projection.rows(qs), request)
+    with timer('serialize'):
+        data = {
+            'data': [projection.represent(row) for row in page],
+            'next_cursor': paginator.next_cursor,
+            'filters_applied': applied_filters
+        }
+    if parse_bool(request.GET.get('include_count')):
+        data['count'], data['count_exact'] = await list_count(
+            qs, applied_filters, exact)
+    return data
+
+
+async def list_strings(request):
+    queryset = String.objects.all().order_by('-created_at', '-id')
+    with timer('filter'):
+        qs, applied_filters = filter_strings(request.GET, queryset)
+    projection = StringProjection.from_params(request.GET)
+    if parse_bool(request.GET.get('stream')):
+        return stream(qs, projection)
+
+    # shares the sync view's cache: results are the same either way
+    result_cache = ListCreateStringView.result_cache
+    key = await sync_to_async(ListCreateStringView.result_cache_key)(
+        request.GET, applied_filters, projection)
+    data = result_cache.get(key)
+    if data is None:
+        data = await list_result(request, qs, projection, applied_filters)
+        result_cache.set(key, data, size=max(len(data['data']), 1))
+        cache_status = 'MISS'
+    else:
+        cache_status = 'HIT'
+    return json_response(data, headers={'X-Cache': cache_status})
+
+
+async def create_string(request):
+    upsert = parse_bool(request.GET.get('upsert'))
+    try:
+        payload = json.loads(request.body)
+    except ValueError as exc:
+        raise ParseError(f"JSON parse error - {exc}")
+    if not isinstance(payload, dict):
+        raise MissingValueException()
+    # saving writes the string and its character rows in one transaction,
+    # which Django only runs synchronously
+    data, created = await sync_to_async(create)(payload, upsert)
+    return json_response(data, status=201 if created else 200)
+
+
+@require_http_methods(['GET', 'POST'])
+@async_api_view(ListCreateStringView)
+async def list_create_strings(request):
+    if request.method == 'POST':
+        return await create_string(request)
+    return await list_strings(request)
+
+
+@require_http_methods(['GET'])
+@async_api_view(RetrieveDeleteView)
+async def retrieve_string(request, string_value):
+    string_id = sha256_hash(string_value)
+    projection = StringProjection.from_params(request.GET)
+    etag = string_etag(string_id, projection.key)
+
+    data, token = await sync_to_async(get_string)(string_id)
+    if data is None:
+        RetrieveDeleteView.cache_stats.miss()
+        cache_status = 'MISS'
+    else:
+        RetrieveDeleteView.cache_stats.hit()
+        cache_status = 'HIT'
+    headers = {'ETag': etag, 'X-Cache': cache_status}
+
+    if etag_matches(request, etag):
+        if data is None and not await String.objects.filter(id=string_id).aexists():
+            raise NotFound("String does not exist in the system")
+        return HttpResponse(status=304, headers=headers)
+    if data is None:
+        try:
+            obj = await String.objects.aget(value=string_value)
+        except String.DoesNotExist:
+            raise NotFound("String does not exist in the system")
+        data = dict(StringSerializer(obj).data)
+        await sync_to_async(set_string)(string_id, token, data)
+    return json_response(projection.project(data), headers=headers)
+
+
+@require_http_methods(['GET'])
+@async_api_view(NaturalLanguageFilterView)
+async def natural_language_filter(request):
+    query = request.GET.get('query', '').strip().lower()
+    if not query:
+        raise InvalidQueryParamsException("Query parameter 'query' is required")
+
+    with timer('parse'):
+        parsed_filters = parse_query(query)
+    projection = StringProjection.from_params(request.GET)
+    cache = caches[RESPONSE_CACHE]
+    prefix = f'nl:{projection.key}' if projection.key else 'nl'
+    key = await sync_to_async(query_cache_key)(prefix, parsed_filters)
+    result = await cache.aget(key)
+    if result is None:
+        NaturalLanguageFilterView.cache_stats.miss()
+        with timer('filter'):
+            queryset = StringsFilter(parsed_filters, String.objects.all()).qs
+        with timer('query'):
+            rows = [row async for row in projection.rows(queryset)]
+        with timer('serialize'):
+            data = [projection.represent(row) for row in rows]
+        result = {
+            'data': data,
+            'count': len(data)
+        }
+        if len(data) <= settings.STRINGS_NL_CACHE_MAX_ROWS:
+            await cache.aset(key, result)
+        cache_status = 'MISS'
+    else:
+        NaturalLanguageFilterView.cache_stats.hit()
+        cache_status = 'HIT'
+
+    return json_response({
+        **result,
+        'interpreted_query': {
+            'original': query,
+            'parsed_filters': parsed_filters
+        }
+    }, headers={'X-Cache': cache_status})
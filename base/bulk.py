@@ -0,0 +1,96 @@
+"""
+NDJSON and CSV files of strings, for the import_strings and export_strings
+commands.
+
+Only the standard library and base.analysis are imported here, so the
+import command's worker processes can load analyze_batch without setting
+up Django.
+"""
+from contextlib import contextmanager
+
+import csv
+import gzip
+import io
+import json
+import sys
+
+from .analysis import analyze
+
+
+FORMATS = ('ndjson', 'csv')
+
+
+def detect_format(path, format=None):
+    """
+    format, or the one named by the extension of path (ignoring .gz);
+    NDJSON when neither says.
+    """
+    if format:
+        return format
+    return 'csv' if path.removesuffix('.gz').endswith('.csv') else 'ndjson'
+
+
+@contextmanager
+def open_file(path, mode, text=False):
+    """
+    Open path for 'rb' or 'wb', as UTF-8 text when text is set.
+    '-' is stdin or stdout, which are left open; a .gz path is gzipped.
+    """
+    if path == '-':
+        stream = sys.stdin.buffer if mode == 'rb' else sys.stdout.buffer
+    else:
+        stream = (gzip.open if path.endswith('.gz') else open)(path, mode)
+    f = io.TextIOWrapper(stream, encoding='utf-8', newline='') if text else stream
+    try:
+        yield f
+    finally:
+        if path != '-':
+            f.close()
+        elif text:
+            # flushes without closing the standard stream underneath
+            f.detach()
+        else:
+            f.flush()
+
+
+def read_values(f, format):
+    """
+    Yield the value of every record of f: an NDJSON line holds a JSON
+    string or an object with a "value", a CSV row its `value` column.
+    Lines that are not JSON yield None. CSV needs a text stream.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(f)
+        if 'value' not in (reader.fieldnames or ()):
+            raise ValueError("CSV input needs a 'value' column")
+        for row in reader:
+            yield row['value']
+        return
+
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield item.get('value') if isinstance(item, dict) else item
+
+
+def analyze_batch(items):
+    """
+    Clean (as serializers.clean_value does) and analyze a batch of values.
+    Return ({value: StringAnalysis}, number of invalid items); values are
+    deduplicated, so each sha256 hash is analyzed once.
+    """
+    analyses = {}
+    invalid = 0
+    for item in items:
+        value = item.strip() if isinstance(item, str) else ''
+        if not value:
+            invalid += 1
+        elif value not in analyses:
+            analyses[value] = analyze(value)
+    return analyses, invalid
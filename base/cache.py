@@ -0,0 +1,381 @@
+from collections import OrderedDict
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from . import metrics
+
+
+RESPONSE_CACHE = 'responses'
+
+GENERATION_KEY = 'strings:generation'
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a SQLite file, shared by every process on the host.
+
+    Every operation is a single SQL statement, so `add` and `incr` are
+    atomic across processes; that is what django_ratelimit needs to enforce
+    one global limit instead of one limit per worker. Integers are stored as
+    SQLite integers so they can be incremented in place, anything else is
+    pickled.
+
+    OPTIONS:
+        TABLE: table name, lets several aliases share one file.
+        BUSY_TIMEOUT: seconds to wait on a locked database (default 5).
+        MAX_ENTRIES / CULL_FREQUENCY: as for Django's built-in backends.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._table = options.get('TABLE', 'cache')
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self):
+        # reconnect after a fork: sqlite connections must not cross processes
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self._table}" ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, bytes):
+            return pickle.loads(value)
+        return value
+
+    def _live(self):
+        """
+        WHERE clause fragment matching keys that have not expired.
+        """
+        return '(expires IS NULL OR expires > ?)'
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # insert, or overwrite only an entry that has already expired
+        cursor = self._db.execute(
+            f'INSERT INTO "{self._table}" (key, value, expires) '
+            'VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE expires IS NOT NULL AND expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout),
+             time.time()),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._cull()
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            f'SELECT value FROM "{self._table}" WHERE key = ? AND {self._live()}',
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return default
+        return self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._db.execute(
+            f'INSERT INTO "{self._table}" (key, value, expires) '
+            'VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        self._db.executemany(
+            f'INSERT INTO "{self._table}" (key, value, expires) '
+            'VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires',
+            [(self.make_and_validate_key(key, version=version),
+              self._encode(value), expires) for key, value in data.items()],
+        )
+        self._cull()
+        return []
+
+    def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT,
+                        version=None):
+        """
+        Store value only if the live entry at key is still `expected` (None:
+        no live entry), in one statement. Return whether it was stored.
+        """
+        if expected is None:
+            return self.add(key, value, timeout, version)
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            f'UPDATE "{self._table}" SET value = ?, expires = ? '
+            f'WHERE key = ? AND value = ? AND {self._live()}',
+            (self._encode(value), self.get_backend_timeout(timeout), key,
+             self._encode(expected), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            f'UPDATE "{self._table}" SET expires = ? '
+            f'WHERE key = ? AND {self._live()}',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            f'DELETE FROM "{self._table}" WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            f'SELECT 1 FROM "{self._table}" WHERE key = ? AND {self._live()}',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            f'UPDATE "{self._table}" SET value = value + ? '
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {self._live()} "
+            'RETURNING value',
+            (delta, cache_key, time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def clear(self):
+        self._db.execute(f'DELETE FROM "{self._table}"')
+
+    def close(self, **kwargs):
+        # the connection is kept for the life of the process, like
+        # persistent database connections
+        pass
+
+    def _cull(self):
+        db = self._db
+        table = f'"{self._table}"'
+        count = db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        count -= db.execute(
+            f'DELETE FROM {table} WHERE expires <= ?', (time.time(),)
+        ).rowcount
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        # drop the entries closest to expiry first
+        db.execute(
+            f'DELETE FROM {table} WHERE key IN ('
+            f'SELECT key FROM {table} ORDER BY expires IS NULL, expires '
+            'LIMIT ?)',
+            (count // self._cull_frequency,),
+        )
+
+
+class CacheStats:
+    """
+    Hit, miss and eviction counts of one cache, per process. They are kept
+    in the cache_requests and cache_evictions metrics, labelled by name.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def hit(self):
+        metrics.CACHE_REQUESTS.inc(self.name, 'hit')
+
+    def miss(self):
+        metrics.CACHE_REQUESTS.inc(self.name, 'miss')
+
+    def evict(self, count=1):
+        metrics.CACHE_EVICTIONS.inc(self.name, amount=count)
+
+    @property
+    def hits(self):
+        return metrics.CACHE_REQUESTS.value(self.name, 'hit')
+
+    @property
+    def misses(self):
+        return metrics.CACHE_REQUESTS.value(self.name, 'miss')
+
+    @property
+    def evictions(self):
+        return metrics.CACHE_EVICTIONS.value(self.name)
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class LRUCache:
+    """
+    In-process cache holding entries up to a total size of max_size,
+    evicting the least recently used first. Each entry states its own
+    size, so the bound can be in rows rather than entries; an entry larger
+    than max_size is not stored.
+    """
+    def __init__(self, max_size, stats):
+        self.max_size = max_size
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self.stats.miss()
+            return default
+        self.stats.hit()
+        return entry[0]
+
+    def set(self, key, value, size=1):
+        if size > self.max_size:
+            return
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            while self._entries and self._size + size > self.max_size:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._size -= old_size
+                evicted += 1
+            self._entries[key] = (value, size)
+            self._size += size
+        if evicted:
+            self.stats.evict(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def string_cache_key(string_id):
+    """
+    Response cache key of a single string, by its sha256 id.
+    """
+    return f'string:{string_id}'
+
+
+def get_string(string_id):
+    """
+    Cached representation of a string, as (data, token). data is None on a
+    miss; pass token back to set_string once the row has been read.
+    """
+    data = caches[RESPONSE_CACHE].get(string_cache_key(string_id))
+    if isinstance(data, tuple):
+        # the tombstone a write left behind
+        return None, data
+    return data, data
+
+
+def set_string(string_id, token, data):
+    """
+    Cache the representation of a string read after get_string returned
+    token, unless the string was written since: a write replaces the entry
+    with a new tombstone, so a row read before a delete commits is dropped.
+    """
+    return caches[RESPONSE_CACHE].compare_and_set(
+        string_cache_key(string_id), token, data)
+
+
+def get_generation():
+    """
+    Current generation of the strings table.
+
+    Cache keys of query results embed it, so bumping it on every write
+    retires all of them at once. A missing counter restarts from the clock
+    rather than from zero, so an evicted counter never brings back the keys
+    of an earlier generation.
+    """
+    cache = caches[RESPONSE_CACHE]
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    cache = caches[RESPONSE_CACHE]
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        return get_generation()
+
+
+def query_cache_key(prefix, filters):
+    """
+    Cache key of a query result: the canonical JSON of its filters under
+    the current table generation.
+    """
+    canonical = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha256(canonical.encode()).hexdigest()
+    return f'{prefix}:{get_generation()}:{digest}'
+
+
+def invalidate_strings(string_ids, created=False):
+    """
+    Retire every cached query result by moving to the next table
+    generation, and replace the cached responses of the given strings with
+    tombstones of that generation. New strings had nothing to cache, so
+    `created` skips the tombstones.
+    """
+    generation = bump_generation()
+    if not created:
+        caches[RESPONSE_CACHE].set_many({
+            string_cache_key(string_id): ('written', generation)
+            for string_id in string_ids
+        })
@@ -0,0 +1,13 @@
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Apply settings.SQLITE_PRAGMAS to every new SQLite connection.
+    Hooked to the connection_created signal in BaseConfig.ready().
+    """
+    from django.conf import settings
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
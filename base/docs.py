@@ -0,0 +1,35 @@
+"""
+Hooks for the API documentation that cost nothing at startup.
+
+Views name their schema dict in base.swaggger with `document` instead of
+applying extend_schema at import, and the docs URLs point at `lazy_view`s,
+so drf_spectacular and the schema dicts are only imported by the first
+docs request (see base.schema_views), or never with API_DOCS_ENABLED off.
+"""
+from django.utils.module_loading import import_string
+
+
+def document(name):
+    """
+    Mark a view method as described by the schema dict `name` of
+    base.swaggger; base.schema.SchemaGenerator applies it.
+    """
+    def decorator(method):
+        method.schema_name = name
+        return method
+    return decorator
+
+
+def lazy_view(view_class, **initkwargs):
+    """
+    View that imports `view_class` (a dotted path) and builds it with
+    as_view(**initkwargs) on its first request.
+    """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_class).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -19,3 +19,20 @@ class MissingValueException(APIException):
 class InvalidQueryParamsException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = "Invalid query parameter values or types"
+
+
+class BatchTooLargeException(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Batch contains too many strings"
+
+
+class DocumentTooLargeException(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Document exceeds the maximum upload size"
+
+
+class AnalysisUnavailableException(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Analysis workers are busy, retry later"
+    # sent as Retry-After
+    wait = 1
@@ -0,0 +1,142 @@
+"""
+Where string analysis runs, chosen by ANALYSIS_EXECUTOR: `inline` in the
+request thread, or a `thread` or `process` pool of ANALYSIS_WORKERS.
+
+Hashing, counting and the palindrome check hold the GIL, so on long values
+only the process pool lets analysis of several requests use several cores;
+the thread pool helps where hashlib releases the GIL (inputs over 2 KiB).
+
+Pools are bounded: at most ANALYSIS_QUEUE_SIZE analyses are queued or
+running per process. A request that cannot get a slot within
+ANALYSIS_QUEUE_TIMEOUT seconds fails with a 503 rather than queueing
+without limit.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+
+from . import metrics
+from .analysis import analyze, analyze_all
+from .exceptions import AnalysisUnavailableException
+
+
+class InlineExecutor:
+    """
+    Analyze in the calling thread.
+    """
+    def analyze(self, value):
+        return analyze(value)
+
+    def analyze_many(self, values):
+        """
+        {value: StringAnalysis} of a list of distinct values.
+        """
+        return dict(zip(values, analyze_all(values)))
+
+    def shutdown(self):
+        pass
+
+
+class PoolExecutor:
+    """
+    Analyze in a concurrent.futures pool behind a bounded queue. Each call
+    holds one slot while it waits; analyze_many splits its values into a
+    few chunks per worker so large batches are spread over the pool.
+    """
+    chunks_per_worker = 4
+
+    def __init__(self, pool, workers, queue_size, timeout):
+        self.pool = pool
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+
+    @contextmanager
+    def slot(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            metrics.ANALYSIS_REJECTIONS.inc()
+            raise AnalysisUnavailableException()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def analyze(self, value):
+        with self.slot():
+            return self.pool.submit(analyze, value).result()
+
+    def analyze_many(self, values):
+        """
+        {value: StringAnalysis} of a list of distinct values.
+        """
+        size = math.ceil(len(values) / (self.workers * self.chunks_per_worker))
+        chunks = [values[i:i + size] for i in range(0, len(values), size or 1)]
+        with self.slot():
+            results = self.pool.map(analyze_all, chunks)
+            return dict(zip(values, itertools.chain.from_iterable(results)))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_executor():
+    """
+    A new executor as configured by the ANALYSIS_* settings.
+    """
+    kind = settings.ANALYSIS_EXECUTOR
+    if kind == 'inline':
+        return InlineExecutor()
+    workers = settings.ANALYSIS_WORKERS or os.cpu_count() or 1
+    if kind == 'thread':
+        pool = ThreadPoolExecutor(workers, thread_name_prefix='analysis')
+    elif kind == 'process':
+        # workers only import base.analysis; spawning them keeps the
+        # server's threads, connections and locks out of the children
+        pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'))
+    else:
+        raise ImproperlyConfigured(
+            f"ANALYSIS_EXECUTOR must be 'inline', 'thread' or 'process', not '{kind}'")
+    return PoolExecutor(
+        pool, workers, settings.ANALYSIS_QUEUE_SIZE,
+        settings.ANALYSIS_QUEUE_TIMEOUT)
+
+
+_executor = None
+_pid = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    The executor of this process, built on first use. A forked worker
+    builds its own: the parent's pool does not survive the fork.
+    """
+    global _executor, _pid
+    if _executor is None or _pid != os.getpid():
+        with _lock:
+            if _executor is None or _pid != os.getpid():
+                _executor = build_executor()
+                _pid = os.getpid()
+    return _executor
+
+
+def reset(setting=None, **kwargs):
+    """
+    Shut the executor down so the next call builds one from the current
+    settings; also a setting_changed handler.
+    """
+    global _executor
+    if setting is not None and not setting.startswith('ANALYSIS_'):
+        return
+    with _lock:
+        if _executor is not None and _pid == os.getpid():
+            _executor.shutdown()
+        _executor = None
@@ -1,7 +1,11 @@
+from decimal import Decimal
+from django.db.models import Value
+
 import django_filters
 
 from .exceptions import InvalidQueryParamsException
-from .models import String
+from .models import String, StringCharacter
+from .utils import parse_bool
 
 
 class StringsFilter(django_filters.FilterSet):
@@ -12,8 +16,16 @@ class StringsFilter(django_filters.FilterSet):
         field_name='length', lookup_expr='lte')
     word_count = django_filters.NumberFilter(
         field_name='word_count', lookup_expr='exact')
+    min_word_count = django_filters.NumberFilter(
+        field_name='word_count', lookup_expr='gte')
+    max_word_count = django_filters.NumberFilter(
+        field_name='word_count', lookup_expr='lte')
     contains_character = django_filters.CharFilter(
-        field_name='value', lookup_expr='icontains')
+        method='filter_contains_character')
+    contains_characters = django_filters.CharFilter(
+        method='filter_contains_characters')
+    excludes_characters = django_filters.CharFilter(
+        method='filter_excludes_characters')
 
     class Meta:
         model = String
@@ -22,16 +34,65 @@ class StringsFilter(django_filters.FilterSet):
             'min_length',
             'max_length',
             'word_count',
-            'contains_character'
+            'min_word_count',
+            'max_word_count',
+            'contains_character',
+            'contains_characters',
+            'excludes_characters'
         ]
 
     def filter_is_palindrome(self, queryset, name, value):
         if value is None:
             return queryset
-        val = str(value).lower()
-        if val in ('true', '1', 'yes'):
-            return queryset.filter(is_palindrome=True)
-        elif val in ('false', '0', 'no'):
-            return queryset.filter(is_palindrome=False)
-        else:
-            raise InvalidQueryParamsException()
+        # compare against a bound value: a bare boolean column in the WHERE
+        # clause keeps SQLite from using the (is_palindrome, length) index
+        return queryset.filter(is_palindrome=Value(parse_bool(value)))
+
+    def filter_contains_character(self, queryset, name, value):
+        if len(value) != 1:
+            return queryset.filter(value__icontains=value)
+        return queryset.filter(id__in=self.having_character(value))
+
+    def filter_contains_characters(self, queryset, name, value):
+        """
+        Strings containing every one of the characters in value.
+        """
+        for ch in set(value):
+            queryset = queryset.filter(id__in=self.having_character(ch))
+        return queryset
+
+    def filter_excludes_characters(self, queryset, name, value):
+        """
+        Strings containing none of the characters in value.
+        """
+        for ch in set(value):
+            queryset = queryset.exclude(id__in=self.having_character(ch))
+        return queryset
+
+    def having_character(self, ch):
+        """
+        Subquery of the ids of strings containing ch, from the character index.
+        """
+        lowered = ch.lower()
+        if len(lowered) != 1:
+            # 'İ' lowercases to two code points, which the index stores apart
+            return String.objects.filter(value__icontains=ch).values('id')
+        return StringCharacter.objects.filter(
+            character=lowered).values('string_id')
+
+
+def filter_strings(params, queryset):
+    """
+    Apply StringsFilter params to queryset.
+    Return the filtered queryset and the filters that were applied.
+    Raise InvalidQueryParamsException on invalid params.
+    """
+    filterset = StringsFilter(params, queryset=queryset)
+    if not filterset.is_valid():
+        raise InvalidQueryParamsException()
+    applied_filters = {
+        k: int(v) if type(v) in [float, Decimal] else v
+        for k, v in filterset.form.cleaned_data.items()
+        if v not in [None, '']
+    }
+    return filterset.qs, applied_filters
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from base.filters import StringsFilter
+from base.models import String
+
+
+# Filter combinations the list and natural language endpoints send most.
+FILTER_COMBINATIONS = [
+    {'is_palindrome': 'true'},
+    {'is_palindrome': 'false'},
+    {'is_palindrome': 'true', 'min_length': 5},
+    {'is_palindrome': 'true', 'max_length': 20},
+    {'is_palindrome': 'true', 'word_count': 1},
+    {'min_length': 5, 'max_length': 20},
+    {'word_count': 2},
+    {'word_count': 2, 'min_length': 10},
+    {'word_count': 1, 'max_length': 8},
+    {'contains_character': 'a'},
+    {'contains_character': 'z', 'is_palindrome': 'true'},
+    {'contains_character': 'e', 'word_count': 1},
+]
+
+# Markers of a full table scan in the EXPLAIN output, per database vendor.
+# SQLite reports `SCAN <table> USING INDEX` when it walks the ordering index
+# and filters every row, which costs as much as a table scan, so any SCAN of
+# the table counts; an index lookup is reported as SEARCH.
+FULL_SCAN_MARKERS = {
+    'sqlite': lambda line, table: f'SCAN {table}' in line,
+    'postgresql': lambda line, table: f'Seq Scan on {table}' in line,
+}
+
+# Same ordering as ListCreateStringView.get_queryset
+ORDERING = ('-created_at', '-id')
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the common StringsFilter combinations and fail "
+        "when one of them falls back to a full table scan."
+    )
+
+    def handle(self, *args, **options):
+        is_full_scan = FULL_SCAN_MARKERS.get(connection.vendor)
+        if is_full_scan is None:
+            raise CommandError(
+                f"Query plan check is not supported on '{connection.vendor}'")
+
+        table = String._meta.db_table
+        base_qs = String.objects.order_by(*ORDERING)
+        failures = []
+
+        for params in FILTER_COMBINATIONS:
+            qs = StringsFilter(params, queryset=base_qs).qs
+            plan = qs.explain()
+            lines = plan.splitlines()
+
+            full_scan = any(is_full_scan(line, table) for line in lines)
+            if full_scan:
+                failures.append(params)
+                self.stdout.write(self.style.ERROR(f"SCAN    {params}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK      {params}"))
+            if options['verbosity'] > 1 or full_scan:
+                for line in lines:
+                    self.stdout.write(f"        {line}")
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} filter combination(s) scan the whole "
+                f"'{table}' table")
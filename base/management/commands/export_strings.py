@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import APIException
+
+import csv
+import json
+import time
+
+from base.bulk import FORMATS, detect_format, open_file
+from base.filters import StringsFilter, filter_strings
+from base.models import String
+from base.renderers import dumps
+from base.serializers import StringProjection
+
+
+def flatten(record):
+    """
+    CSV row of a string representation: every property gets its own
+    column and the frequency map is written as a JSON object.
+    """
+    row = {key: value for key, value in record.items() if key != 'properties'}
+    row.update(record.get('properties', {}))
+    if 'character_frequency_map' in row:
+        row['character_frequency_map'] = json.dumps(
+            row['character_frequency_map'], ensure_ascii=False,
+            separators=(',', ':'))
+    return row
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the strings matching the StringsFilter options to an NDJSON "
+        "or CSV file, streaming rows from the database in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help="File to write, '-' for stdout; .gz files are compressed")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help="Output format (default: from the file extension, else ndjson)")
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Rows fetched from the database at a time")
+        parser.add_argument(
+            '--fields', help="Comma separated fields, as the `fields` query parameter")
+        parser.add_argument(
+            '--no-frequency', action='store_true',
+            help="Leave out character_frequency_map")
+        for name in StringsFilter.base_filters:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}", dest=name, metavar='VALUE',
+                help=f"Same as the `{name}` query parameter")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = detect_format(path, options['format'])
+        params = {
+            name: options[name] for name in StringsFilter.base_filters
+            if options[name] is not None
+        }
+        try:
+            queryset, _ = filter_strings(
+                params, String.objects.order_by('created_at', 'id'))
+            projection = StringProjection.from_params({
+                'fields': options['fields'],
+                'include_frequency': not options['no_frequency'],
+            })
+        except APIException as exc:
+            raise CommandError(exc.detail)
+
+        start = time.perf_counter()
+        rows = projection.rows(queryset).iterator(chunk_size=options['chunk_size'])
+        count = 0
+        try:
+            with open_file(path, 'wb', text=format == 'csv') as f:
+                if format == 'csv':
+                    writer = csv.DictWriter(f, fieldnames=[
+                        *projection.fields, *projection.properties,
+                        *['created_at'] * projection.created_at])
+                    writer.writeheader()
+                    for row in rows:
+                        writer.writerow(flatten(projection.represent(row)))
+                        count += 1
+                else:
+                    for row in rows:
+                        f.write(dumps(projection.represent(row)) + b'\n')
+                        count += 1
+        except OSError as exc:
+            raise CommandError(exc)
+
+        # keep stdout clean when the export itself goes there
+        out = self.stderr if path == '-' else self.stdout
+        out.write(self.style.SUCCESS(
+            f"Exported {count} strings in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,101 @@
+from collections import deque
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+import itertools
+import multiprocessing
+import os
+import time
+
+from base.bulk import FORMATS, analyze_batch, detect_format, open_file, read_values
+from base.models import String
+
+
+def batches(items, size):
+    items = iter(items)
+    while batch := list(itertools.islice(items, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Import strings from an NDJSON or CSV file. Records are analyzed in "
+        "a pool of worker processes and inserted in bulk, one transaction "
+        "per batch; values already in the database are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help="File to read, '-' for stdin; .gz files are decompressed")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help="Input format (default: from the file extension, else ndjson)")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Analysis processes (default: one per CPU); 1 analyzes inline")
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Records per analysis task and per insert transaction")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = detect_format(path, options['format'])
+        workers = options['workers']
+        batch_size = options['batch_size']
+        if workers < 1 or batch_size < 1:
+            raise CommandError("--workers and --batch-size must be positive")
+        self.verbosity = options['verbosity']
+        self.totals = dict.fromkeys(('read', 'created', 'duplicate', 'invalid'), 0)
+        self.start = time.perf_counter()
+
+        try:
+            with open_file(path, 'rb', text=format == 'csv') as f:
+                tasks = batches(read_values(f, format), batch_size)
+                if workers == 1:
+                    for batch in tasks:
+                        self.write(len(batch), analyze_batch(batch))
+                else:
+                    self.run_pool(tasks, workers)
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        totals = self.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} strings from {totals['read']} records "
+            f"({totals['duplicate']} duplicates, {totals['invalid']} invalid) "
+            f"in {time.perf_counter() - self.start:.1f}s"))
+
+    def run_pool(self, tasks, workers):
+        """
+        Analyze batches in worker processes while this process inserts the
+        finished ones, in order.
+        """
+        # forked workers must not inherit open database connections
+        connections.close_all()
+        with multiprocessing.Pool(workers) as pool:
+            pending = deque()
+            for batch in tasks:
+                pending.append(
+                    (len(batch), pool.apply_async(analyze_batch, (batch,))))
+                # a bounded window keeps memory flat however large the file
+                if len(pending) >= 2 * workers:
+                    size, result = pending.popleft()
+                    self.write(size, result.get())
+            while pending:
+                size, result = pending.popleft()
+                self.write(size, result.get())
+
+    def write(self, size, result):
+        analyses, invalid = result
+        created = len(String.create_many(list(analyses), analyses=analyses))
+        totals = self.totals
+        totals['read'] += size
+        totals['created'] += created
+        totals['invalid'] += invalid
+        totals['duplicate'] += size - invalid - created
+        if self.verbosity > 0:
+            rate = totals['read'] / (time.perf_counter() - self.start)
+            self.stderr.write(
+                f"  {totals['read']} read, {totals['created']} created, "
+                f"{totals['duplicate']} duplicates, {totals['invalid']} invalid "
+                f"({rate:.0f} records/s)")
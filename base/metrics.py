@@ -0,0 +1,264 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Enabled with METRICS_ENABLED. When it is off the middleware removes itself
+at startup, no query hook is installed and timer() hands back a shared
+no-op context manager after checking a module flag.
+
+Metrics are kept per process: behind several workers each scrape of
+/metrics sees the worker that served it.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import nullcontext
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+import bisect
+import threading
+import time
+
+
+LATENCY_BUCKETS = (
+    .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative histogram with one series per label set.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield '_bucket', labels + (le,), self.labels + ('le',), cumulative
+            yield '_sum', labels, self.labels, total
+            yield '_count', labels, self.labels, cumulative
+
+
+class Counter:
+    """
+    Monotonic counter with one series per label set.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._series.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            series = dict(self._series)
+        for labels, value in sorted(series.items()):
+            yield '_total', labels, self.labels, value
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency per route.',
+    labels=('route', 'method', 'status'))
+DB_QUERIES = Histogram(
+    'db_queries_per_request', 'Database queries run per request.',
+    labels=('route',), buckets=QUERY_COUNT_BUCKETS)
+DB_TIME = Histogram(
+    'db_query_duration_seconds', 'Time spent in database queries per request.',
+    labels=('route',))
+STAGE_LATENCY = Histogram(
+    'stage_duration_seconds',
+    'Time spent in a request stage (parse, filter, query, count, '
+    'serialize, render, analyze).',
+    labels=('stage',))
+RATELIMIT_REJECTIONS = Counter(
+    'ratelimit_rejections', 'Requests rejected by the rate limit.',
+    labels=('route',))
+ANALYSIS_REJECTIONS = Counter(
+    'analysis_rejections',
+    'Analyses refused with a 503 because the executor queue was full.')
+CACHE_REQUESTS = Counter(
+    'cache_requests', 'Response cache lookups per cache and result.',
+    labels=('cache', 'result'))
+CACHE_EVICTIONS = Counter(
+    'cache_evictions', 'Entries evicted from the in-process caches.',
+    labels=('cache',))
+
+REGISTRY = [
+    REQUEST_LATENCY, DB_QUERIES, DB_TIME, STAGE_LATENCY, RATELIMIT_REJECTIONS,
+    ANALYSIS_REJECTIONS, CACHE_REQUESTS, CACHE_EVICTIONS]
+
+
+# copy of settings.METRICS_ENABLED, read by configure() at startup: a
+# settings lookup costs more than the rest of a disabled timer()
+ENABLED = False
+
+
+def configure(setting='METRICS_ENABLED', **kwargs):
+    """
+    Load METRICS_ENABLED; also a setting_changed handler.
+    """
+    global ENABLED
+    if setting == 'METRICS_ENABLED':
+        ENABLED = settings.METRICS_ENABLED
+
+
+def enabled():
+    return ENABLED
+
+
+def render():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for suffix, values, names, value in metric.samples():
+            labels = ','.join(
+                f'{name}="{escape(value)}"' for name, value in zip(names, values))
+            lines.append(f'{metric.name}{suffix}{{{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, self.stage)
+
+
+NULL_TIMER = nullcontext()
+
+
+def timer(stage):
+    """
+    Context manager recording the time spent in a stage of the request.
+    """
+    if not ENABLED:
+        return NULL_TIMER
+    return StageTimer(stage)
+
+
+# [query count, query seconds] of the current request; a context variable
+# so queries run by sync_to_async in another thread still reach it
+_queries = ContextVar('metrics_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Connection execute wrapper adding each query to the current request.
+    """
+    stats = _queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """
+    connection_created handler wrapping every new connection with
+    record_query while metrics are enabled.
+    """
+    if ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count and query time per route, and rate limit
+    rejections. Removed at startup when METRICS_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _queries.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = _queries.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, elapsed, stats):
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+        REQUEST_LATENCY.observe(
+            elapsed, route, request.method, str(response.status_code))
+        DB_QUERIES.observe(stats[0], route)
+        DB_TIME.observe(stats[1], route)
+        if response.status_code == 429:
+            RATELIMIT_REJECTIONS.inc(route)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='string',
+            index=models.Index(fields=['-created_at', '-id'], name='string_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='string',
+            index=models.Index(fields=['is_palindrome', 'length'], name='string_palindrome_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='string',
+            index=models.Index(fields=['word_count', 'length'], name='string_word_count_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='string',
+            index=models.Index(fields=['length'], name='string_length_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_characters(apps, schema_editor):
+    String = apps.get_model('base', 'String')
+    StringCharacter = apps.get_model('base', 'StringCharacter')
+    batch = []
+    for pk, value in String.objects.values_list('id', 'value').iterator():
+        batch.extend(
+            StringCharacter(string_id=pk, character=ch)
+            for ch in set(value.lower())
+        )
+        if len(batch) >= 5000:
+            StringCharacter.objects.bulk_create(batch)
+            batch = []
+    StringCharacter.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_string_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StringCharacter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character', models.CharField(max_length=4)),
+                ('string', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='characters', to='base.string')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('character', 'string'), name='string_character_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_characters, migrations.RunPython.noop),
+    ]
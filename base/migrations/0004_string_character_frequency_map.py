@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:35
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def backfill_frequency_map(apps, schema_editor):
+    String = apps.get_model('base', 'String')
+    batch = []
+    for obj in String.objects.only('id', 'value').iterator(chunk_size=2000):
+        obj.character_frequency_map = Counter(obj.value)
+        batch.append(obj)
+        if len(batch) >= 2000:
+            String.objects.bulk_update(batch, ['character_frequency_map'])
+            batch = []
+    String.objects.bulk_update(batch, ['character_frequency_map'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_string_characters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='string',
+            name='character_frequency_map',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(backfill_frequency_map, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_string_character_frequency_map'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ('content', models.FileField(upload_to='documents/')),
+                ('size', models.BigIntegerField()),
+                ('length', models.BigIntegerField()),
+                ('is_palindrome', models.BooleanField(default=False)),
+                ('unique_characters', models.IntegerField()),
+                ('word_count', models.BigIntegerField()),
+                ('character_frequency_map', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:48
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def backfill_statistics(apps, schema_editor):
+    String = apps.get_model('base', 'String')
+    StringStatistic = apps.get_model('base', 'StringStatistic')
+    counts = Counter()
+    rows = String.objects.values_list(
+        'is_palindrome', 'length', 'word_count', 'character_frequency_map')
+    for is_palindrome, length, word_count, frequency_map in rows.iterator(
+            chunk_size=2000):
+        counts['total', ''] += 1
+        counts['palindromes', ''] += is_palindrome
+        counts['length', str(length)] += 1
+        counts['word_count', str(word_count)] += 1
+        for ch, n in frequency_map.items():
+            counts['character', ch] += n
+    StringStatistic.objects.bulk_create(
+        StringStatistic(metric=metric, bucket=bucket, count=n)
+        for (metric, bucket), n in counts.items()
+        if n
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StringStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=16)),
+                ('bucket', models.CharField(blank=True, default='', max_length=64)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='string_statistic_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:33
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def backfill_count_counters(apps, schema_editor):
+    String = apps.get_model('base', 'String')
+    StringStatistic = apps.get_model('base', 'StringStatistic')
+    counts = Counter()
+    rows = String.objects.values_list(
+        'is_palindrome', 'length', 'character_frequency_map')
+    for is_palindrome, length, frequency_map in rows.iterator(chunk_size=2000):
+        if is_palindrome:
+            counts['palindrome_length', str(length)] += 1
+        for ch in {c for ch in frequency_map for c in ch.lower()}:
+            counts['contains', ch] += 1
+    StringStatistic.objects.bulk_create(
+        StringStatistic(metric=metric, bucket=bucket, count=n)
+        for (metric, bucket), n in counts.items()
+        if n
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_string_statistics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stringstatistic',
+            name='metric',
+            field=models.CharField(max_length=32),
+        ),
+        migrations.RunPython(backfill_count_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,12 @@
-from django.db import models
+from collections import Counter
+from django.db import connection, models, transaction
 
-import hashlib
+import json
+
+from .cache import invalidate_strings
+from .executors import get_executor
+from .metrics import timer
+from .utils import parse_bool
 
 
 class String(models.Model):
@@ -10,7 +16,21 @@ class String(models.Model):
     is_palindrome = models.BooleanField(default=False)
     unique_characters = models.IntegerField()
     word_count = models.IntegerField()
+    character_frequency_map = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], name='string_created_at_idx'),
+            models.Index(
+                fields=['is_palindrome', 'length'],
+                name='string_palindrome_length_idx'),
+            models.Index(
+                fields=['word_count', 'length'],
+                name='string_word_count_length_idx'),
+            models.Index(fields=['length'], name='string_length_idx'),
+        ]
     
     def __str__(self):
         """
@@ -25,45 +45,393 @@ class String(models.Model):
             f"  word_count: {self.word_count}"
         )
 
-    def _set_length(self):
+    def _set_characters(self, replace=True):
         """
-        Get string length.
+        Index the distinct lowercased characters of the string.
         """
-        self.length = len(self.value)
-    
-    def _set_hash(self):
+        if replace:
+            self.characters.all().delete()
+        StringCharacter.objects.bulk_create(
+            StringCharacter(string=self, character=ch)
+            for ch in set(self.value.lower())
+        )
+
+    def _set_string_details(self, analysis=None):
         """
-        Get string hash using SHA256 algo.
+        Set the analyzed properties of the string, from analysis when it
+        has already been computed.
         """
-        self.id = hashlib.sha256(self.value.encode()).hexdigest()
-        
-    def _check_palindrome(self):
-        s = self.value
-        return s == s[::-1]
+        if analysis is None:
+            with timer('analyze'):
+                analysis = get_executor().analyze(self.value)
+        self.id = analysis.sha256_hash
+        self.length = analysis.length
+        self.is_palindrome = analysis.is_palindrome
+        self.unique_characters = analysis.unique_characters
+        self.word_count = analysis.word_count
+        self.character_frequency_map = analysis.character_frequency_map
+        return analysis
         
-    def _set_unique_chars(self):
+    @classmethod
+    def create_many(cls, values, batch_size=1000, analyses=None):
         """
-        Set the number of unique chars.
+        Analyze and insert many values in a single transaction.
+        Values already in the db are skipped with one `value__in` query
+        per chunk. The rest are analyzed by the analysis executor, unless
+        `analyses` maps them to StringAnalysis results computed elsewhere.
+        Returns the created instances in input order.
         """
-        chars = [ch for ch in self.value if ch.isalnum()]
-        self.unique_characters = len(set(chars))
+        values = list(dict.fromkeys(values))
+        existing = set()
+        for i in range(0, len(values), batch_size):
+            existing.update(cls.objects.filter(
+                value__in=values[i:i + batch_size]
+            ).values_list('value', flat=True))
+        values = [value for value in values if value not in existing]
+        if analyses is None:
+            with timer('analyze'):
+                analyses = get_executor().analyze_many(values)
+
+        strings = []
+        for value in values:
+            obj = cls(value=value)
+            obj._set_string_details(analyses.get(value))
+            strings.append(obj)
 
-    def _set_word_count(self):
+        characters = [
+            (obj.id, ch)
+            for obj in strings
+            for ch in set(obj.value.lower())
+        ]
+        with transaction.atomic():
+            # a concurrent insert of the same value must not sink the batch
+            cls.objects.bulk_create(
+                strings, batch_size=batch_size, ignore_conflicts=True)
+            StringCharacter.insert_many(characters)
+            # rows lost to a concurrent insert carry that insert's timestamp
+            inserted = set()
+            ids = [obj.id for obj in strings]
+            for i in range(0, len(ids), batch_size):
+                inserted.update(cls.objects.filter(
+                    pk__in=ids[i:i + batch_size]
+                ).values_list('id', 'created_at'))
+            strings = [
+                obj for obj in strings if (obj.id, obj.created_at) in inserted]
+            StringStatistic.record(strings)
+            if strings:
+                transaction.on_commit(
+                    lambda: invalidate_strings(
+                        [obj.id for obj in strings], created=True))
+        return strings
+
+    @classmethod
+    def delete_many(cls, queryset, batch_size=1000):
         """
-        Set the word count in the string.
+        Delete the strings matched by queryset with a single DELETE
+        statement, then their character rows, in one transaction.
+        Returns the ids of the deleted strings.
         """
-        self.word_count = len(self.value.split(' '))
+        subquery, params = queryset.order_by().values('id').query.sql_with_params()
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # RETURNING reads back exactly the rows this statement
+                # removed, so the counters cannot miss a concurrent change
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE id IN ({subquery}) '
+                    'RETURNING id, is_palindrome, length, word_count, '
+                    'character_frequency_map',
+                    params,
+                )
+                rows = cursor.fetchall()
+            # character rows go second: the filters may read them, and the
+            # foreign key is only checked at commit
+            ids = [row[0] for row in rows]
+            for i in range(0, len(ids), batch_size):
+                StringCharacter.objects.filter(
+                    string_id__in=ids[i:i + batch_size]).delete()
+            StringStatistic.record([
+                (is_palindrome, length, word_count, json.loads(frequency_map))
+                for _, is_palindrome, length, word_count, frequency_map in rows
+            ], sign=-1)
+            if ids:
+                transaction.on_commit(lambda: invalidate_strings(ids))
+        return ids
 
-    def _set_string_details(self):
-        self._set_hash()
-        self._set_length()
-        self.is_palindrome = self._check_palindrome()
-        self._set_unique_chars()
-        self._set_word_count()
-        
     def save(self, *args, **kwargs):
         if not self.value:
             raise ValueError("<String> Value cannot be null.")
         self._set_string_details()
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # a new string has no character rows to replace yet
+            self._set_characters(replace=not adding)
+            if adding:
+                StringStatistic.record([self])
+            transaction.on_commit(
+                lambda: invalidate_strings([self.id], created=adding))
         return self
+
+    def delete(self, *args, **kwargs):
+        # the collector clears self.pk once the row is gone
+        string_id = self.pk
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            StringStatistic.record([self], sign=-1)
+            transaction.on_commit(lambda: invalidate_strings([string_id]))
+        return result
+
+
+class StringCharacter(models.Model):
+    """
+    One row per distinct lowercased character of a string.
+    Answers `contains_character` with an index lookup instead of a LIKE scan.
+    """
+    string = models.ForeignKey(
+        String, on_delete=models.CASCADE, related_name='characters')
+    character = models.CharField(max_length=4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['character', 'string'],
+                name='string_character_unique'),
+        ]
+
+    @classmethod
+    def insert_many(cls, rows):
+        """
+        Insert (string_id, character) rows with a single executemany,
+        skipping rows that already exist. At ~15 rows per string, building
+        model instances for bulk_create costs far more than the insert.
+        """
+        if not rows:
+            return
+        # in string_id order the index pages are written one after another
+        rows = sorted(rows)
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (string_id, character) VALUES (%s, %s) '
+                'ON CONFLICT DO NOTHING',
+                rows,
+            )
+
+
+class StringStatistic(models.Model):
+    """
+    Corpus counters of the strings table, kept up to date on every insert
+    and delete so the stats endpoint never aggregates the table itself.
+
+    One row per (metric, bucket): `total` and `palindromes` have an empty
+    bucket, the `length`, `palindrome_length` and `word_count` histograms
+    are bucketed by value, `character` holds the global frequency of each
+    character and `contains` the number of strings containing each
+    lowercased character, as the character index does.
+    """
+    metric = models.CharField(max_length=32)
+    bucket = models.CharField(max_length=64, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'bucket'],
+                name='string_statistic_unique'),
+        ]
+
+    @staticmethod
+    def count_strings(strings):
+        """
+        Counter of (metric, bucket) over strings, or over
+        (is_palindrome, length, word_count, character_frequency_map) rows.
+        """
+        counts = Counter()
+        for obj in strings:
+            if isinstance(obj, String):
+                obj = (obj.is_palindrome, obj.length, obj.word_count,
+                       obj.character_frequency_map)
+            is_palindrome, length, word_count, frequency_map = obj
+            counts['total', ''] += 1
+            counts['palindromes', ''] += is_palindrome
+            counts['length', str(length)] += 1
+            counts['word_count', str(word_count)] += 1
+            if is_palindrome:
+                counts['palindrome_length', str(length)] += 1
+            for ch, n in frequency_map.items():
+                counts['character', ch] += n
+            for ch in {c for ch in frequency_map for c in ch.lower()}:
+                counts['contains', ch] += 1
+        return counts
+
+    @classmethod
+    def record(cls, strings, sign=1):
+        """
+        Add (or with sign=-1, remove) strings to the counters.
+        Each counter is bumped in place by an upsert, so concurrent writers
+        never overwrite each other.
+        """
+        rows = [
+            (metric, bucket, sign * n)
+            for (metric, bucket), n in cls.count_strings(strings).items()
+            if n
+        ]
+        if not rows:
+            return
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (metric, bucket, count) '
+                'VALUES (%s, %s, %s) ON CONFLICT (metric, bucket) '
+                f'DO UPDATE SET count = {table}.count + excluded.count',
+                rows,
+            )
+
+    @classmethod
+    def counters(cls):
+        """
+        Current non-zero counters as {(metric, bucket): count}.
+        """
+        return {
+            (metric, bucket): count
+            for metric, bucket, count in cls.objects.exclude(
+                count=0).values_list('metric', 'bucket', 'count')
+        }
+
+    @classmethod
+    def count_filtered(cls, filters, exact=True):
+        """
+        Count the strings matching cleaned StringsFilter `filters` (as
+        filter_strings returns them) from the counters, as (count, exact).
+
+        Filters on palindromes and length, on word count, or on a single
+        character are answered exactly. Other combinations are estimated,
+        taking those groups as independent, when `exact` is false, and
+        return None otherwise.
+        """
+        contained = set(filters.get('contains_characters', '').lower())
+        substring = filters.get('contains_character', '')
+        # a longer substring is only bounded by the characters it holds
+        approximate = len(substring) > 1
+        contained.update(substring.lower())
+        excluded = set(filters.get('excludes_characters', '').lower())
+
+        histograms = {'length': {}, 'palindrome_length': {}, 'word_count': {}}
+        containing = {}
+        total = 0
+        rows = cls.objects.filter(
+            models.Q(metric__in=['total', *histograms])
+            | models.Q(metric='contains', bucket__in=contained | excluded)
+        ).values_list('metric', 'bucket', 'count')
+        for metric, bucket, n in rows:
+            if metric == 'total':
+                total = n
+            elif metric == 'contains':
+                containing[bucket] = n
+            else:
+                histograms[metric][int(bucket)] = n
+        if not total:
+            return 0, True
+
+        def in_range(histogram, low, high):
+            return sum(
+                n for bucket, n in histogram.items()
+                if (low is None or bucket >= low)
+                and (high is None or bucket <= high)
+            )
+
+        # one count per filter group, each exact on its own
+        groups = []
+        palindrome = filters.get('is_palindrome')
+        low, high = filters.get('min_length'), filters.get('max_length')
+        if palindrome is not None or low is not None or high is not None:
+            n = in_range(histograms['length'], low, high)
+            if palindrome is not None:
+                palindromes = in_range(histograms['palindrome_length'], low, high)
+                n = palindromes if parse_bool(palindrome) else n - palindromes
+            groups.append(n)
+        word_counts = [
+            filters.get(name) for name in
+            ('word_count', 'min_word_count', 'word_count', 'max_word_count')]
+        if any(value is not None for value in word_counts):
+            low = max((v for v in word_counts[:2] if v is not None), default=None)
+            high = min((v for v in word_counts[2:] if v is not None), default=None)
+            groups.append(in_range(histograms['word_count'], low, high))
+        groups.extend(containing.get(ch, 0) for ch in contained)
+        groups.extend(total - containing.get(ch, 0) for ch in excluded)
+
+        if not groups:
+            return total, True
+        if len(groups) == 1 and not approximate:
+            return groups[0], True
+        if exact:
+            return None
+        estimate = total
+        for n in groups:
+            estimate *= n / total
+        return round(estimate), False
+
+    @classmethod
+    def recompute(cls, chunk_size=2000):
+        """
+        Rebuild the counters from the strings table.
+        Return the counters that had drifted as
+        {(metric, bucket): (stored, actual)}.
+        """
+        with transaction.atomic():
+            stored = cls.counters()
+            actual = cls.count_strings(String.objects.values_list(
+                'is_palindrome', 'length', 'word_count',
+                'character_frequency_map',
+            ).iterator(chunk_size=chunk_size))
+            actual = {key: n for key, n in actual.items() if n}
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                cls(metric=metric, bucket=bucket, count=n)
+                for (metric, bucket), n in actual.items()
+            )
+        return {
+            key: (stored.get(key, 0), actual.get(key, 0))
+            for key in stored.keys() | actual.keys()
+            if stored.get(key, 0) != actual.get(key, 0)
+        }
+
+
+class Document(models.Model):
+    """
+    Text too large for String.value, analyzed as a stream.
+    The text itself is kept in file storage, outside the indexed columns.
+    """
+    id = models.CharField(primary_key=True, max_length=64, editable=False)
+    content = models.FileField(upload_to='documents/')
+    size = models.BigIntegerField()
+    length = models.BigIntegerField()
+    is_palindrome = models.BooleanField(default=False)
+    unique_characters = models.IntegerField()
+    word_count = models.BigIntegerField()
+    character_frequency_map = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Document representation.
+        """
+        return f"<Document {self.id}> : {self.size} bytes"
+
+    def _set_document_details(self, analysis):
+        """
+        Set the properties computed by a StreamAnalyzer.
+        """
+        self.id = analysis.sha256_hash
+        self.length = analysis.length
+        self.is_palindrome = analysis.is_palindrome
+        self.unique_characters = analysis.unique_characters
+        self.word_count = analysis.word_count
+        self.character_frequency_map = analysis.character_frequency_map
+
+    def delete(self, *args, **kwargs):
+        content = self.content
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: content.delete(save=False))
+        return result
@@ -0,0 +1,93 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+
+import binascii
+
+from .exceptions import InvalidQueryParamsException
+
+
+class KeysetPagination:
+    """
+    Cursor pagination keyed on (created_at, id).
+
+    Pages are fetched with a range predicate on the last row seen instead of
+    an OFFSET, so every page costs the same no matter how deep it is.
+    The queryset is expected to be ordered by ('-created_at', '-id').
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'STRINGS_PAGE_SIZE', 100)
+        self.max_page_size = getattr(settings, 'STRINGS_MAX_PAGE_SIZE', 1000)
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        """
+        Pagination is opt-in: it applies once a cursor or page size is sent.
+        """
+        params = request.GET
+        return (
+            self.cursor_query_param in params
+            or self.page_size_query_param in params
+        )
+
+    def encode_cursor(self, obj):
+        raw = f"{obj.created_at.isoformat()}|{obj.id}".encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, pk = urlsafe_b64decode(padded).decode().split('|', 1)
+            return datetime.fromisoformat(created_at), pk
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidQueryParamsException("Invalid pagination cursor")
+
+    def get_page_size(self, request):
+        page_size = request.GET.get(self.page_size_query_param)
+        if page_size is None:
+            return self.page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise InvalidQueryParamsException()
+        if page_size < 1:
+            raise InvalidQueryParamsException()
+        return min(page_size, self.max_page_size)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Slice of queryset holding the requested page plus one extra row,
+        which tells whether a next page exists.
+        """
+        self.page_size = self.get_page_size(request)
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, id__lt=pk)
+            )
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, rows):
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return rows
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return the rows of the requested page and set `next_cursor`.
+        """
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async paginate_queryset().
+        """
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.get_page([obj async for obj in page_queryset])
@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+import codecs
+import json
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list, one item per non-blank line.
+    A line that is not valid JSON becomes a ParseError in its slot so the
+    caller can report it without rejecting the other lines.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        items = []
+        try:
+            for lineno, line in enumerate(codecs.getreader(encoding)(stream), 1):
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError as exc:
+                    items.append(ParseError(
+                        f"JSON parse error on line {lineno} - {exc}"))
+        except UnicodeDecodeError as exc:
+            raise ParseError(f"NDJSON decode error - {exc}")
+        return items
@@ -0,0 +1,334 @@
+"""
+Natural language query parser.
+
+Turns queries such as "single word palindromes", "strings that are not
+palindromes and longer than 10 characters" or "between 2 and 4 words
+containing the letters a and z" into StringsFilter parameters.
+
+The query is split into word and number tokens by one precompiled pattern,
+then read left to right by a small grammar:
+
+    query      := (clause | filler)*
+    clause     := negation? (palindrome | comparison | count | characters)
+    negation   := ("not" | "non" | "isn't" | "aren't" | "no" | "without") link*
+    link       := "contain..." | "include..." | "have" | "the" | "a" | ...
+    palindrome := "palindrome..."
+    comparison := comparator number unit? | "between" number "and" number unit?
+    count      := number unit "long"? | "single" word-unit
+    characters := ("letter" | "character") char (("and" | "or")? char)*
+                | ordinal "vowel"
+
+A negation applies to the clause right after it, and any other token in
+between drops it: "non-empty palindromes" are palindromes. Negated exact
+counts and ranges have no filter and are rejected.
+
+Units are characters (the default) or words. Parsed queries are memoized
+by their normalized text, so repeated queries skip tokenizing entirely.
+"""
+from functools import lru_cache
+
+import re
+
+from .exceptions import InvalidQueryParamsException, UnprocessableEntityException
+
+
+# numbers and words of Unicode letters, so "the letter é" keeps its letter
+TOKEN_RE = re.compile(r"\d+|[^\W\d_]+(?:'[^\W\d_]+)?")
+
+NUMBER_WORDS = {
+    word: n for n, word in enumerate([
+        'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven',
+        'eight', 'nine', 'ten', 'eleven', 'twelve', 'thirteen', 'fourteen',
+        'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen', 'twenty',
+    ])
+}
+
+VOWELS = {
+    'first': 'a',
+    'second': 'e',
+    'third': 'i',
+    'fourth': 'o',
+    'fifth': 'u',
+    'last': 'u',
+}
+
+NEGATIONS = {'not', 'non', "isn't", "aren't", "don't", "doesn't", 'no', 'without'}
+
+# words that may sit between a negation and its clause
+NEGATION_LINKS = {
+    'contain', 'contains', 'containing', 'include', 'includes', 'including',
+    'have', 'has', 'having', 'with', 'be', 'the', 'any', 'a', 'an',
+}
+
+CHAR_UNITS = {'character', 'characters', 'char', 'chars', 'letters'}
+WORD_UNITS = {'word', 'words'}
+CHARACTER_WORDS = {'letter', 'letters', 'character', 'characters', 'char'}
+
+# first word -> [(phrase, operator, default unit)], longest phrases first
+COMPARATORS = {}
+for phrase, (op, default_unit) in sorted({
+    ('longer', 'than'): ('>', 'chars'),
+    ('shorter', 'than'): ('<', 'chars'),
+    ('more', 'than'): ('>', None),
+    ('greater', 'than'): ('>', None),
+    ('over',): ('>', None),
+    ('above',): ('>', None),
+    ('less', 'than'): ('<', None),
+    ('fewer', 'than'): ('<', None),
+    ('under',): ('<', None),
+    ('below',): ('<', None),
+    ('at', 'least'): ('>=', None),
+    ('minimum', 'of'): ('>=', None),
+    ('at', 'most'): ('<=', None),
+    ('maximum', 'of'): ('<=', None),
+    ('no', 'more', 'than'): ('<=', None),
+    ('no', 'longer', 'than'): ('<=', 'chars'),
+    ('exactly',): ('=', None),
+    ('of', 'length'): ('=', 'chars'),
+}.items(), key=lambda item: -len(item[0])):
+    COMPARATORS.setdefault(phrase[0], []).append((phrase, op, default_unit))
+
+NEGATED = {'>': '<=', '<': '>=', '>=': '<', '<=': '>'}
+
+
+def normalize(query):
+    """
+    Lowercase query and collapse its whitespace.
+    """
+    return ' '.join(query.lower().split())
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.negated = False
+        self.filters = {}
+        self.contains = []
+        self.excludes = []
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def match(self, phrase):
+        return tuple(self.tokens[self.pos:self.pos + len(phrase)]) == phrase
+
+    def number(self, offset=0):
+        token = self.peek(offset)
+        if token is None:
+            return None
+        if token.isdigit():
+            return int(token)
+        return NUMBER_WORDS.get(token)
+
+    def unit(self, offset, default='chars'):
+        """
+        Unit token at offset, as ('chars' | 'words', tokens consumed).
+        """
+        token = self.peek(offset)
+        if token in WORD_UNITS:
+            return 'words', 1
+        if token in CHAR_UNITS:
+            return 'chars', 1
+        return default, 0
+
+    def parse(self):
+        tokens = self.tokens
+        while self.pos < len(tokens):
+            token = tokens[self.pos]
+            # comparisons go first: "no more than" starts with a negation
+            if token in COMPARATORS and self.comparison(token):
+                continue
+            if token in NEGATIONS:
+                self.negated = True
+                self.pos += 1
+                continue
+            rule = CLAUSES.get(token)
+            if rule is None:
+                if token.startswith('palindrom'):
+                    rule = _Parser.palindrome
+                elif token.isdigit():
+                    rule = _Parser.count
+            if rule is None or not rule(self):
+                if token not in NEGATION_LINKS:
+                    self.negated = False
+                self.pos += 1
+        return self.result()
+
+    # clauses
+
+    def palindrome(self):
+        self.set_flag('is_palindrome', not self.negated)
+        self.negated = False
+        self.pos += 1
+        return True
+
+    def comparison(self, token):
+        for phrase, op, default_unit in COMPARATORS[token]:
+            if not self.match(phrase):
+                continue
+            n = self.number(len(phrase))
+            if n is None:
+                continue
+            unit, used = self.unit(len(phrase) + 1, default_unit or 'chars')
+            if self.negated:
+                op = self.negate(op)
+            self.constrain(unit, op, n)
+            self.pos += len(phrase) + 1 + used
+            return True
+        return False
+
+    def between(self):
+        if self.peek(2) != 'and':
+            return False
+        low, high = self.number(1), self.number(3)
+        if low is None or high is None:
+            return False
+        unit, used = self.unit(4)
+        if self.negated:
+            raise UnprocessableEntityException(
+                "Query parsed but a negated range cannot be filtered")
+        self.constrain(unit, '>=', min(low, high))
+        self.constrain(unit, '<=', max(low, high))
+        self.pos += 4 + used
+        return True
+
+    def count(self):
+        n = 1 if self.peek() == 'single' else self.number()
+        unit, used = self.unit(1, default=None)
+        if n is None or not used:
+            return False
+        self.constrain(unit, self.negate('=') if self.negated else '=', n)
+        self.pos += 1 + used
+        if self.peek() == 'long':
+            self.pos += 1
+        return True
+
+    def characters(self):
+        chars = []
+        offset = 1
+        while True:
+            token = self.peek(offset)
+            # "the letter a and 5 words": a number before a unit is a count
+            is_char = (
+                token is not None and len(token) == 1
+                and not self.unit(offset + 1, default=None)[1]
+            )
+            if is_char:
+                chars.append(token)
+                offset += 1
+            elif token in ('and', 'or') and chars:
+                offset += 1
+            else:
+                break
+        if not chars:
+            return False
+        (self.excludes if self.negated else self.contains).extend(chars)
+        self.negated = False
+        self.pos += offset
+        return True
+
+    def vowel(self):
+        if self.peek(1) != 'vowel':
+            return False
+        char = VOWELS[self.peek()]
+        (self.excludes if self.negated else self.contains).append(char)
+        self.negated = False
+        self.pos += 2
+        return True
+
+    # filters
+
+    def negate(self, op):
+        """
+        The opposite comparison operator; clears the pending negation.
+        """
+        if op not in NEGATED:
+            raise UnprocessableEntityException(
+                "Query parsed but a negated exact count cannot be filtered")
+        self.negated = False
+        return NEGATED[op]
+
+    def set_flag(self, name, value):
+        if self.filters.get(name, value) != value:
+            raise UnprocessableEntityException(
+                "Query parsed but resulted in conflicting filters")
+        self.filters[name] = value
+
+    def constrain(self, unit, op, n):
+        low, high, exact = {
+            'chars': ('min_length', 'max_length', None),
+            'words': ('min_word_count', 'max_word_count', 'word_count'),
+        }[unit]
+        filters = self.filters
+        if op == '>':
+            filters[low] = max(filters.get(low, 0), n + 1)
+        elif op == '>=':
+            filters[low] = max(filters.get(low, 0), n)
+        elif op == '<':
+            n = n - 1 if n > 1 else 1
+            filters[high] = min(filters.get(high, n), n)
+        elif op == '<=':
+            filters[high] = min(filters.get(high, n), n)
+        elif exact:
+            self.set_flag(exact, n)
+        else:
+            filters[low] = max(filters.get(low, 0), n)
+            filters[high] = min(filters.get(high, n), n)
+
+    def result(self):
+        filters = self.filters
+        contains = ''.join(dict.fromkeys(self.contains))
+        excludes = ''.join(dict.fromkeys(self.excludes))
+        if len(contains) == 1:
+            filters['contains_character'] = contains
+        elif contains:
+            filters['contains_characters'] = contains
+        if excludes:
+            filters['excludes_characters'] = excludes
+
+        if not filters:
+            raise InvalidQueryParamsException("Unable to parse natural language query")
+
+        conflicts = (
+            filters.get('min_length', 0) > filters.get('max_length', float('inf'))
+            or filters.get('min_word_count', 0) > filters.get(
+                'max_word_count', float('inf'))
+            or set(contains) & set(excludes)
+        )
+        word_count = filters.get('word_count')
+        if word_count is not None:
+            conflicts = conflicts or not (
+                filters.get('min_word_count', word_count)
+                <= word_count
+                <= filters.get('max_word_count', word_count)
+            )
+        if conflicts:
+            raise UnprocessableEntityException(
+                "Query parsed but resulted in conflicting filters")
+        return filters
+
+
+# first token -> clause rule; palindrome words and digits are matched in parse()
+CLAUSES = {
+    'between': _Parser.between,
+    'single': _Parser.count,
+    **{word: _Parser.count for word in NUMBER_WORDS},
+    **{word: _Parser.characters for word in CHARACTER_WORDS},
+    **{word: _Parser.vowel for word in VOWELS},
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_normalized(query):
+    return tuple(_Parser(TOKEN_RE.findall(query)).parse().items())
+
+
+def parse_query(query):
+    """
+    Parse a natural language query into StringsFilter parameters.
+    Raise InvalidQueryParamsException if nothing could be parsed and
+    UnprocessableEntityException if the parsed filters contradict.
+    """
+    return dict(_parse_normalized(normalize(query)))
@@ -0,0 +1,51 @@
+"""
+JSON encoding for responses, with orjson when it is installed.
+
+orjson is an optional dependency: without it everything falls back to the
+stdlib encoder with DRF's JSONEncoder, producing the same JSON.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+import json
+
+from .metrics import timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """
+    Encode data as compact UTF-8 JSON bytes.
+    """
+    if orjson is not None:
+        # anything orjson cannot encode natively goes through DRF's encoder
+        try:
+            return orjson.dumps(data, default=_encoder.default)
+        except orjson.JSONEncodeError:
+            # non-str keys (the stats histograms) become strings, as with
+            # json.dumps; the option slows every dict down, so only on retry
+            return orjson.dumps(
+                data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with dumps(), unless indentation is asked for.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        with timer('render'):
+            return dumps(data)
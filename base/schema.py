@@ -0,0 +1,20 @@
+"""
+OpenAPI schema generation, the DEFAULT_GENERATOR_CLASS of drf_spectacular.
+"""
+from drf_spectacular.generators import SchemaGenerator as BaseSchemaGenerator
+from drf_spectacular.utils import extend_schema
+
+from . import swaggger
+
+
+class SchemaGenerator(BaseSchemaGenerator):
+    """
+    Apply the schema dicts views name with base.docs.document before their
+    endpoints are inspected.
+    """
+    def create_view(self, callback, method, request=None):
+        handler = getattr(getattr(callback, 'cls', None), method.lower(), None)
+        name = getattr(handler, 'schema_name', None)
+        if name is not None and 'schema' not in getattr(handler, 'kwargs', {}):
+            extend_schema(**getattr(swaggger, name))(handler)
+        return super().create_view(callback, method, request)
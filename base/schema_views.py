@@ -0,0 +1,60 @@
+"""
+The schema view, imported on the first docs request.
+
+The schema only changes with the code, so it is generated once per process
+and served from memory; with API_SCHEMA_FILE it is read from a file written
+at build time by `python manage.py spectacular --file schema.yml` instead.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from drf_spectacular.views import SpectacularAPIView
+
+import threading
+import yaml
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    The schema, built once per API version and language and rendered once
+    per media type, then served from memory.
+    """
+    _schemas = {}
+    _rendered = {}
+    _lock = threading.Lock()
+
+    def _get_schema_response(self, request):
+        version = (
+            self.api_version or request.version
+            or self._get_version_parameter(request))
+        renderer, media_type = request.accepted_renderer, request.accepted_media_type
+        key = (version, translation.get_language(), media_type)
+        content = self._rendered.get(key)
+        if content is None:
+            with self._lock:
+                content = self._rendered.get(key)
+                if content is None:
+                    schema = self.get_schema(request, version)
+                    content = self._rendered[key] = renderer.render(
+                        schema, media_type, self.get_renderer_context())
+        if renderer.charset:
+            media_type = f'{media_type}; charset={renderer.charset}'
+        response = HttpResponse(content, content_type=media_type)
+        response['Content-Disposition'] = (
+            f'inline; filename="{self._get_filename(request, version)}"')
+        return response
+
+    def get_schema(self, request, version):
+        key = (version, translation.get_language())
+        if key not in self._schemas:
+            self._schemas[key] = self.build_schema(request, version)
+        return self._schemas[key]
+
+    def build_schema(self, request, version):
+        if settings.API_SCHEMA_FILE:
+            # JSON schema files parse as YAML too
+            with open(settings.API_SCHEMA_FILE) as f:
+                return yaml.safe_load(f)
+        generator = self.generator_class(
+            urlconf=self.urlconf, api_version=version, patterns=self.patterns)
+        return generator.get_schema(request=request, public=self.serve_public)
@@ -1,12 +1,166 @@
+from django.db import IntegrityError
 from rest_framework import serializers
-from collections import Counter
 
 from .exceptions import (
+    InvalidQueryParamsException,
     MissingValueException,
     DuplicateEntryException, 
     UnprocessableEntityException
 )
-from .models import String
+from .models import Document, String
+from .utils import parse_bool
+
+
+def clean_value(value):
+    """
+    Check that value is a non-blank string and return it stripped.
+    """
+    if not isinstance(value, str):
+        raise UnprocessableEntityException()
+    value = value.strip()
+    if not value:
+        raise MissingValueException()
+    return value
+
+
+STRING_COLUMNS = (
+    'id',
+    'value',
+    'length',
+    'is_palindrome',
+    'unique_characters',
+    'word_count',
+    'character_frequency_map',
+    'created_at',
+)
+
+_created_at = serializers.DateTimeField()
+
+
+def string_rows(queryset, columns=STRING_COLUMNS):
+    """
+    The columns StringSerializer reads, as named tuples: much cheaper to
+    build than model instances, and read the same way by the paginator.
+    """
+    return queryset.values_list(*columns, named=True)
+
+
+def represent_string(row):
+    """
+    StringSerializer output for a string_rows() row, built as a plain dict
+    without the per-field serializer machinery.
+    """
+    (string_id, value, length, is_palindrome, unique_characters,
+     word_count, character_frequency_map, created_at) = row
+    return {
+        'id': string_id,
+        'value': value,
+        'properties': {
+            'length': length,
+            'is_palindrome': is_palindrome,
+            'unique_characters': unique_characters,
+            'word_count': word_count,
+            'sha256_hash': string_id,
+            'character_frequency_map': character_frequency_map
+        },
+        'created_at': _created_at.to_representation(created_at)
+    }
+
+
+# property name -> column it is read from
+PROPERTY_COLUMNS = {
+    'length': 'length',
+    'is_palindrome': 'is_palindrome',
+    'unique_characters': 'unique_characters',
+    'word_count': 'word_count',
+    'sha256_hash': 'id',
+    'character_frequency_map': 'character_frequency_map',
+}
+
+
+class StringProjection:
+    """
+    Sparse fieldset of the string representation, from the `fields` and
+    `include_frequency` query parameters.
+
+    `fields` takes top-level names (id, value, properties, created_at) and
+    property names, which keep only those properties. Only the columns
+    behind the kept fields are selected, plus id and created_at for the
+    cursor paginator, so a skipped frequency map is never read or decoded.
+    """
+    def __init__(self, fields=None, include_frequency=True):
+        if fields is None:
+            fields = ['id', 'value', 'properties', 'created_at']
+        properties = set()
+        for name in fields:
+            if name == 'properties':
+                properties.update(PROPERTY_COLUMNS)
+            elif name in PROPERTY_COLUMNS:
+                properties.add(name)
+            elif name not in ('id', 'value', 'created_at'):
+                raise InvalidQueryParamsException(f"Unknown field '{name}'")
+        if not include_frequency:
+            properties.discard('character_frequency_map')
+
+        self.fields = [name for name in ('id', 'value') if name in fields]
+        self.properties = [name for name in PROPERTY_COLUMNS if name in properties]
+        self.created_at = 'created_at' in fields
+        if not (self.fields or self.properties or self.created_at):
+            raise InvalidQueryParamsException("No fields left to return")
+
+        self.full = (
+            len(self.fields) == 2
+            and len(self.properties) == len(PROPERTY_COLUMNS)
+            and self.created_at
+        )
+        needed = {'id', 'created_at', *self.fields}
+        needed.update(PROPERTY_COLUMNS[name] for name in self.properties)
+        self.columns = tuple(c for c in STRING_COLUMNS if c in needed)
+        # distinguishes cached results of different projections
+        self.key = '' if self.full else ','.join(
+            self.fields + self.properties + ['created_at'] * self.created_at)
+
+    @classmethod
+    def from_params(cls, params):
+        fields = params.get('fields')
+        if fields:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+        return cls(
+            fields or None,
+            parse_bool(params.get('include_frequency'), default=True))
+
+    def rows(self, queryset):
+        return string_rows(queryset, self.columns)
+
+    def represent(self, row):
+        """
+        Representation of a rows() row.
+        """
+        if self.full:
+            return represent_string(row)
+        data = {name: getattr(row, name) for name in self.fields}
+        if self.properties:
+            data['properties'] = {
+                name: getattr(row, PROPERTY_COLUMNS[name])
+                for name in self.properties
+            }
+        if self.created_at:
+            data['created_at'] = _created_at.to_representation(row.created_at)
+        return data
+
+    def project(self, data):
+        """
+        Cut a full representation down to the projection.
+        """
+        if self.full:
+            return data
+        result = {name: data[name] for name in self.fields}
+        if self.properties:
+            result['properties'] = {
+                name: data['properties'][name] for name in self.properties}
+        if self.created_at:
+            result['created_at'] = data['created_at']
+        return result
 
 
 class StringSerializer(serializers.ModelSerializer):
@@ -34,27 +188,14 @@ class StringSerializer(serializers.ModelSerializer):
             'unique_characters': obj.unique_characters,
             'word_count': obj.word_count,
             'sha256_hash': obj.id,
-            'character_frequency_map': Counter(obj.value)
+            'character_frequency_map': obj.character_frequency_map
         }
     
-    def _check_duplicity(self, value):
-        """
-        Ensures the string does not already exist in the db.
-        """
-        if String.objects.filter(value=value).exists():
-            raise DuplicateEntryException()
-
     def validate_value(self, value):
         """
         Validate the value input.
         """
-        if not isinstance(value, str):
-            raise UnprocessableEntityException()
-        value = value.strip()
-        if not value:
-            raise MissingValueException()
-        self._check_duplicity(value)
-        return value
+        return clean_value(value)
 
     def validate(self, attrs):
         value = attrs.get('value', None)
@@ -63,5 +204,51 @@ class StringSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
+        """
+        Insert the string and let the unique `value` column reject
+        duplicates, so a create is one INSERT and concurrent creates of the
+        same value cannot both succeed. With `upsert` in the context the
+        existing string is returned instead; `created` tells them apart.
+        """
         value = validated_data.get('value')
-        return String.objects.create(value=value)
+        # a string deleted between the failed insert and the read is
+        # inserted once more; losing that race too is a conflict
+        for _ in range(2):
+            try:
+                instance = String.objects.create(value=value)
+            except IntegrityError:
+                if not self.context.get('upsert'):
+                    raise DuplicateEntryException()
+                try:
+                    instance = String.objects.get(value=value)
+                except String.DoesNotExist:
+                    continue
+                self.created = False
+                return instance
+            self.created = True
+            return instance
+        raise DuplicateEntryException()
+
+
+class DocumentSerializer(serializers.ModelSerializer):
+    properties = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Document
+        fields = [
+            'id',
+            'size',
+            'properties',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_properties(self, obj):
+        return {
+            'length': obj.length,
+            'is_palindrome': obj.is_palindrome,
+            'unique_characters': obj.unique_characters,
+            'word_count': obj.word_count,
+            'sha256_hash': obj.id,
+            'character_frequency_map': obj.character_frequency_map
+        }
@@ -1,11 +1,16 @@
 
-from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, OpenApiTypes
 from rest_framework import serializers
 
 
 # REQUEST
 class StringRequestData(serializers.Serializer):
     value = serializers.CharField()
+
+
+class StringDeleteRequestData(serializers.Serializer):
+    values = serializers.ListField(child=serializers.CharField(), required=False)
+    hashes = serializers.ListField(child=serializers.CharField(), required=False)
     
     
 # RESPONSE
@@ -29,9 +34,32 @@ class StringResponseData(serializers.Serializer):
       created_at = serializers.DateTimeField()
 
 
+class BatchItemResponseData(serializers.Serializer):
+    index = serializers.IntegerField(default=0)
+    value = serializers.CharField(required=False, default="string to analyze")
+    status = serializers.ChoiceField(choices=['created', 'duplicate', 'invalid'])
+    data = StringResponseData(required=False)
+    detail = serializers.CharField(required=False)
+
+
+class BatchResponseData(serializers.Serializer):
+    results = BatchItemResponseData(many=True)
+    created = serializers.IntegerField(default=1)
+    duplicate = serializers.IntegerField(default=0)
+    invalid = serializers.IntegerField(default=0)
+
+
+class DocumentResponseData(serializers.Serializer):
+    id = serializers.CharField(default="sha256_hash_value")
+    size = serializers.IntegerField(default=1048576)
+    properties = PropertySerializer()
+    created_at = serializers.DateTimeField()
+
+
 class StringListResponseData(serializers.Serializer):
     data = StringResponseData(many=True)
     count = serializers.IntegerField(default=1)
+    count_exact = serializers.BooleanField(default=True, required=False)
     filters_applied = serializers.DictField(default={
         'contains_character': 'a',
         'word_count': 3,
@@ -39,6 +67,14 @@ class StringListResponseData(serializers.Serializer):
     })
 
 
+class StringDeleteResponseData(serializers.Serializer):
+    deleted = serializers.IntegerField(default=120)
+    dry_run = serializers.BooleanField(default=False)
+    filters_applied = serializers.DictField(default={
+        'max_length': 2
+    })
+
+
 class NaturalLanguageStringResponseData(serializers.Serializer):
     data = StringResponseData(many=True)
     count = serializers.IntegerField(default=1)
@@ -50,6 +86,23 @@ class NaturalLanguageStringResponseData(serializers.Serializer):
     })
 
 
+class StatisticDriftData(serializers.Serializer):
+    metric = serializers.CharField(default='length')
+    bucket = serializers.CharField(default='7')
+    stored = serializers.IntegerField(default=2)
+    actual = serializers.IntegerField(default=3)
+
+
+class StringStatsResponseData(serializers.Serializer):
+    total_strings = serializers.IntegerField(default=4)
+    palindromes = serializers.IntegerField(default=1)
+    palindrome_ratio = serializers.FloatField(default=0.25)
+    length_histogram = serializers.DictField(default={'5': 3, '7': 1})
+    word_count_histogram = serializers.DictField(default={'1': 3, '2': 1})
+    character_frequency = serializers.DictField(default={'a': 6, 'r': 2})
+    drift = StatisticDriftData(many=True, required=False)
+
+
 # ERRORS
 # 400
 class InvalidQuerySerializer(serializers.Serializer):
@@ -64,6 +117,14 @@ class MissingValueSerializer(serializers.Serializer):
     detail = serializers.CharField(default="Invalid request body or missing 'value' field")
 
 
+class BatchTooLargeSerializer(serializers.Serializer):
+    detail = serializers.CharField(default="Batch contains more than 50000 strings")
+
+
+class DocumentTooLargeSerializer(serializers.Serializer):
+    detail = serializers.CharField(default="Document exceeds the maximum upload size")
+
+
 # 404
 class NotFoundSerializer(serializers.Serializer):
     detail = serializers.CharField(default="String does not exist in the system")
@@ -88,64 +149,191 @@ class TooManyRequestsSerializer(serializers.Serializer):
     detail = serializers.CharField(default="Too many requests.")
 
 
+# 503
+class AnalysisUnavailableSerializer(serializers.Serializer):
+    detail = serializers.CharField(default="Analysis workers are busy, retry later")
+
+
 
 # SCHEMAS
+filter_parameters = [
+    OpenApiParameter(
+        name='is_palindrome',
+        type=OpenApiTypes.BOOL,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='min_length',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='max_length',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='word_count',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='contains_character',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='min_word_count',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='max_word_count',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='contains_characters',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Strings containing every one of these characters'
+    ),
+    OpenApiParameter(
+        name='excludes_characters',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Strings containing none of these characters'
+    )
+]
+
+projection_parameters = [
+    OpenApiParameter(
+        name='fields',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Comma separated fields to return: id, value, properties, created_at \
+            or single properties such as length or is_palindrome'
+    ),
+    OpenApiParameter(
+        name='include_frequency',
+        type=OpenApiTypes.BOOL,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Set to false to leave out character_frequency_map'
+    )
+]
+
 create_string_schema = {
     'summary': 'Create a string',
-    'description': 'Take a value in request body and analyze the value.',
+    'description': 'Take a value in request body and analyze the value. \
+        With `upsert=true` an existing value is returned with a 200 instead of a 409.',
     'operation_id': 'create_string',
     'tags': ['String'],
+    'parameters': [
+        OpenApiParameter(
+            name='upsert',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Return the existing string instead of failing on duplicates'
+        )
+    ],
     'request': StringRequestData,
     'responses': {
+        200: StringResponseData,
         201: StringResponseData,
         400: MissingValueSerializer,
         409: DuplicateEntrySerializer,
         422: UnprocessableEntitySerializer,
-        429: TooManyRequestsSerializer
+        429: TooManyRequestsSerializer,
+        503: AnalysisUnavailableSerializer
+    }
+}
+
+batch_create_strings_schema = {
+    'summary': 'Create strings in bulk',
+    'description': 'Take a JSON array (or `application/x-ndjson` lines) of strings or `{"value": ...}` objects \
+        and analyze them in one transaction. Every item gets its own `created`, `duplicate` or `invalid` result.',
+    'operation_id': 'batch_create_strings',
+    'tags': ['String'],
+    'request': StringRequestData(many=True),
+    'responses': {
+        200: BatchResponseData,
+        400: MissingValueSerializer,
+        413: BatchTooLargeSerializer,
+        429: TooManyRequestsSerializer,
+        503: AnalysisUnavailableSerializer
     }
 }
 
 get_strings_list_schema = {
     'summary': 'Get lists of strings',
     'description': 'Returns a list of string data. It takes filtering parameters. \
-        Parameters may include `is_palindrome`, `min_length`, `max_length`, `word_count` and `contains_character`',
+        Parameters may include `is_palindrome`, `min_length`, `max_length`, `word_count` and `contains_character`. \
+        Sending `page_size` or `cursor` switches to cursor pagination, and `stream=true` streams every match as NDJSON.',
     'operation_id': 'get_string_list',
     'tags': ['String'],
     'parameters': [
+        *filter_parameters,
         OpenApiParameter(
-            name='is_palindrome',
-            type=OpenApiTypes.BOOL,
+            name='page_size',
+            type=OpenApiTypes.INT,
             location=OpenApiParameter.QUERY,
             required=False
         ),
         OpenApiParameter(
-            name='min_length',
-            type=OpenApiTypes.INT,
+            name='cursor',
+            type=OpenApiTypes.STR,
             location=OpenApiParameter.QUERY,
             required=False
         ),
         OpenApiParameter(
-            name='max_length',
-            type=OpenApiTypes.INT,
+            name='include_count',
+            type=OpenApiTypes.BOOL,
             location=OpenApiParameter.QUERY,
             required=False
         ),
         OpenApiParameter(
-            name='word_count',
-            type=OpenApiTypes.INT,
+            name='count_only',
+            type=OpenApiTypes.BOOL,
             location=OpenApiParameter.QUERY,
-            required=False
+            required=False,
+            description='Return only `count`, read from the statistics counters where they cover the filters'
         ),
         OpenApiParameter(
-            name='contains_character',
-            type=OpenApiTypes.STR,
+            name='exact',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='With `exact=false`, counts the counters cannot answer exactly are estimated instead of counted'
+        ),
+        OpenApiParameter(
+            name='stream',
+            type=OpenApiTypes.BOOL,
             location=OpenApiParameter.QUERY,
             required=False
-        )
+        ),
+        *projection_parameters
     ],
     'request': None,
     'responses': {
-        200: StringListResponseData,
+        200: OpenApiResponse(
+            response=StringListResponseData,
+            description='Paginated requests return `next_cursor` and only include `count` \
+                with `include_count=true`. `count_only=true` returns an empty `data`. Counts of paginated \
+                and count only requests come with `count_exact`, false for estimates. \
+                `stream=true` returns one string object per line (application/x-ndjson).'
+        ),
         400: InvalidQuerySerializer
     }
 }
@@ -153,7 +341,11 @@ get_strings_list_schema = {
 get_string_list_natural_language = {
     'summary': 'Get list of strings based on natual language query string.',
     'description': 'Returns a list of strings based on the query string that is passed. \
-        Parameter string is parsed to retrieve the filtering fields.',
+        Parameter string is parsed to retrieve the filtering fields. Supports palindromes and their negation \
+        ("not palindromes"), length and word count comparisons ("longer than 5", "at most 3 words"), \
+        ranges ("between 2 and 4 words"), several characters ("the letters a and z", "without the letter x") \
+        and vowel ordinals ("the first vowel"). A negation applies to the clause right after it; negated \
+        exact counts and ranges ("not one word", "not between 2 and 4 words") return a 422.',
     'operation_id': 'get_string_list_natural_language',
     'tags': ['String'],
     'parameters': [
@@ -161,7 +353,8 @@ get_string_list_natural_language = {
             name='query',
             type=OpenApiTypes.STR,
             location=OpenApiParameter.QUERY
-        )
+        ),
+        *projection_parameters
     ],
     'request': None,
     'responses': {
@@ -172,14 +365,53 @@ get_string_list_natural_language = {
     }
 }
 
+get_string_stats_schema = {
+    'summary': 'Get corpus statistics',
+    'description': 'Get the total number of strings, the palindrome ratio, \
+        the length and word count histograms and the global character \
+        frequency. They are read from counters kept up to date on every \
+        write. `recompute=true` rebuilds the counters from the strings \
+        table and reports the ones that had drifted.',
+    'operation_id': 'get_string_stats',
+    'tags': ['String'],
+    'parameters': [
+        OpenApiParameter(
+            name='recompute',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Rebuild and verify the counters'
+        )
+    ],
+    'request': None,
+    'responses': {
+        200: StringStatsResponseData,
+        400: InvalidQuerySerializer,
+        429: TooManyRequestsSerializer
+    }
+}
+
 get_string_schema = {
     'summary': 'Get a specific string',
-    'description': 'Get a string matching the value passed to path.',
+    'description': 'Get a string matching the value passed to path. \
+        Responses are cached by sha256 and carry it as an `ETag`, \
+        followed by the fields when `fields` narrows the body.',
     'operation_id': 'get_string',
     'tags': ['String'],
+    'parameters': [
+        OpenApiParameter(
+            name='If-None-Match',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.HEADER,
+            required=False,
+            description='ETag from a previous response with the same `fields`'
+        ),
+        *projection_parameters
+    ],
     'request': None,
     'responses': {
         200: StringResponseData,
+        304: OpenApiResponse(description='String unchanged since the ETag was issued'),
         404: NotFoundSerializer,
         429: TooManyRequestsSerializer
     }
@@ -197,3 +429,79 @@ delete_string_schema = {
         429: TooManyRequestsSerializer
     }
 }
+
+delete_strings_schema = {
+    'summary': 'Delete strings in bulk',
+    'description': 'Delete every string matching the filter parameters and, if the body lists them, \
+        one of the `values` or `hashes`, in one transaction. Returns the number of deleted strings. \
+        With `dry_run=true` nothing is deleted and the number that would be is returned. \
+        A request with no filters, values or hashes is rejected rather than deleting every string.',
+    'operation_id': 'delete_strings',
+    'tags': ['String'],
+    'parameters': [
+        *filter_parameters,
+        OpenApiParameter(
+            name='dry_run',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Only count the strings that would be deleted'
+        )
+    ],
+    'request': StringDeleteRequestData,
+    'responses': {
+        200: StringDeleteResponseData,
+        400: InvalidQuerySerializer,
+        413: BatchTooLargeSerializer,
+        429: TooManyRequestsSerializer
+    }
+}
+
+create_document_schema = {
+    'summary': 'Analyze a large document',
+    'description': 'Take UTF-8 text as the raw request body, or as the `file` part of a multipart body, \
+        and analyze it as a stream. The text is stored on disk, outside the strings table.',
+    'operation_id': 'create_document',
+    'tags': ['Document'],
+    'request': {
+        'text/plain': OpenApiTypes.BINARY,
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {'file': {'type': 'string', 'format': 'binary'}}
+        }
+    },
+    'responses': {
+        201: DocumentResponseData,
+        400: MissingValueSerializer,
+        409: DuplicateEntrySerializer,
+        413: DocumentTooLargeSerializer,
+        422: UnprocessableEntitySerializer,
+        429: TooManyRequestsSerializer
+    }
+}
+
+get_document_schema = {
+    'summary': 'Get a document',
+    'description': 'Get the analysis of a document by its sha256 hash.',
+    'operation_id': 'get_document',
+    'tags': ['Document'],
+    'request': None,
+    'responses': {
+        200: DocumentResponseData,
+        404: NotFoundSerializer,
+        429: TooManyRequestsSerializer
+    }
+}
+
+delete_document_schema = {
+    'summary': 'Delete a document',
+    'description': 'Delete a document and its stored text by its sha256 hash.',
+    'operation_id': 'delete_document',
+    'tags': ['Document'],
+    'request': None,
+    'responses': {
+        204: {},
+        404: NotFoundSerializer,
+        429: TooManyRequestsSerializer
+    }
+}
@@ -0,0 +1,120 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django_ratelimit.core import is_ratelimited
+from unittest import mock
+
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from .models import String
+
+
+@override_settings(RATELIMIT_ENABLE=False)
+class UpsertTests(TestCase):
+    def post(self, value):
+        return self.client.post(
+            '/strings?upsert=true', {'value': value},
+            content_type='application/json')
+
+    def test_upsert_returns_existing_string(self):
+        self.assertEqual(self.post('abba').status_code, 201)
+        response = self.post('abba')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['value'], 'abba')
+
+    def test_upsert_retries_when_the_duplicate_is_deleted(self):
+        String.objects.create(value='abba')
+        get = String.objects.get
+
+        def delete_then_get(**kwargs):
+            # a concurrent DELETE lands between the failed insert and the read
+            String.objects.filter(**kwargs).delete()
+            return get(**kwargs)
+
+        with mock.patch.object(String.objects, 'get', side_effect=delete_then_get):
+            response = self.post('abba')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(String.objects.filter(value='abba').exists())
+
+    def test_upsert_conflicts_when_the_race_is_lost_twice(self):
+        String.objects.create(value='abba')
+        # the row stays, but every read after a failed insert misses it
+        with mock.patch.object(String.objects, 'get', side_effect=String.DoesNotExist):
+            response = self.post('abba')
+        self.assertEqual(response.status_code, 409)
+
+
+@override_settings(RATELIMIT_ENABLE=False)
+class ConcurrentCreateTests(TransactionTestCase):
+    threads = 8
+
+    def hammer(self, path, value):
+        """
+        POST value from every thread at once; return the response statuses.
+        """
+        barrier = threading.Barrier(self.threads)
+
+        def post(_):
+            barrier.wait()
+            try:
+                return Client().post(
+                    path, {'value': value},
+                    content_type='application/json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as pool:
+            return Counter(pool.map(post, range(self.threads)))
+
+    def test_one_create_per_value(self):
+        for i in range(5):
+            statuses = self.hammer('/strings', f'concurrent value {i}')
+            self.assertEqual(statuses, {201: 1, 409: self.threads - 1})
+        self.assertEqual(String.objects.count(), 5)
+
+    def test_one_create_per_value_with_upsert(self):
+        for i in range(5):
+            statuses = self.hammer('/strings?upsert=true', f'concurrent value {i}')
+            self.assertEqual(statuses, {201: 1, 200: self.threads - 1})
+        self.assertEqual(String.objects.count(), 5)
+
+
+RATE = '50/h'
+LIMIT = 50
+
+
+def allowed_requests(requests):
+    """
+    Requests let through by the rate limit out of `requests` from one
+    client address, counted in the shared cache.
+    """
+    request = RequestFactory().get('/strings', REMOTE_ADDR='10.0.0.1')
+    return sum(
+        not is_ratelimited(
+            request, group='shared-cache-test', key='ip', rate=RATE,
+            increment=True)
+        for _ in range(requests)
+    )
+
+
+class SharedRateLimitTests(TestCase):
+    processes = 4
+
+    def test_limit_is_shared_across_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            location = os.path.join(tmp, 'cache.sqlite3')
+            caches = {
+                alias: {**config, 'LOCATION': location}
+                for alias, config in settings.CACHES.items()
+            }
+            # forked workers inherit the overridden caches and reconnect
+            with override_settings(CACHES=caches):
+                context = multiprocessing.get_context('fork')
+                with context.Pool(self.processes) as pool:
+                    allowed = pool.map(allowed_requests, [30] * self.processes)
+        self.assertEqual(sum(allowed), LIMIT)
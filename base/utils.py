@@ -0,0 +1,41 @@
+from .exceptions import InvalidQueryParamsException
+
+
+TRUTHY = ('true', '1', 'yes')
+FALSY = ('false', '0', 'no')
+
+
+def parse_bool(value, default=False):
+    """
+    Parse a boolean query parameter.
+    Raise InvalidQueryParamsException on unrecognised values.
+    """
+    if value is None or value == '':
+        return default
+    val = str(value).lower()
+    if val in TRUTHY:
+        return True
+    if val in FALSY:
+        return False
+    raise InvalidQueryParamsException()
+
+
+def string_etag(string_id, projection_key=''):
+    """
+    ETag of a string representation: its sha256 id, plus the fields when
+    `fields=` narrows the body.
+    """
+    if not projection_key:
+        return f'"{string_id}"'
+    return f'"{string_id};{projection_key.replace(",", "+")}"'
+
+
+def etag_matches(request, etag):
+    """
+    Whether the request's If-None-Match header matches etag.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in tags or '*' in tags
@@ -1,39 +1,59 @@
-from drf_spectacular.utils import extend_schema
 from django.utils.decorators import method_decorator
 from django_ratelimit.decorators import ratelimit
-from decimal import Decimal
-from django.http import Http404, JsonResponse
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import status, generics
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-import re
-
-from .exceptions import InvalidQueryParamsException, UnprocessableEntityException
-from .filters import StringsFilter
-from .models import String
-from .serializers import StringSerializer
-from .swaggger import (
-    create_string_schema,
-    get_string_schema,
-    get_strings_list_schema,
-    get_string_list_natural_language,
-    delete_string_schema
-)
+import tempfile
 
-VOWELS = {
-    'first': 'a',
-    'second': 'e',
-    'third': 'i',
-    'fourth': 'o',
-    'fifth': 'u'
-}
+from .analysis import StreamAnalyzer, sha256_hash
+from .cache import (
+    RESPONSE_CACHE,
+    CacheStats,
+    LRUCache,
+    get_string,
+    query_cache_key,
+    set_string
+)
+from .docs import document
+from .exceptions import (
+    BatchTooLargeException,
+    DocumentTooLargeException,
+    DuplicateEntryException,
+    InvalidQueryParamsException,
+    MissingValueException,
+    UnprocessableEntityException
+)
+from .filters import StringsFilter, filter_strings
+from . import metrics
+from .metrics import timer
+from .models import Document, String, StringStatistic
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
+from .query_parser import parse_query
+from .renderers import dumps
+from .serializers import (
+    DocumentSerializer,
+    StringProjection,
+    StringSerializer,
+    clean_value
+)
+from .utils import etag_matches, parse_bool, string_etag
 
 
 @method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
 class ListCreateStringView(APIView):
-    filterset_class = StringsFilter
+    pagination_class = KeysetPagination
+    # results of repeated list queries, until the next write
+    result_cache = LRUCache(
+        getattr(settings, 'STRINGS_LIST_CACHE_ROWS', 50000), CacheStats('list'))
     
     def dispatch(self, request, *args, **kwargs):
         if getattr(request, 'limited', False):
@@ -43,45 +63,302 @@ class ListCreateStringView(APIView):
         return super().dispatch(request, *args, **kwargs)
         
     def get_queryset(self):
-        queryset = String.objects.all().order_by('-created_at')
-        filterset = self.filterset_class(self.request.GET, queryset=queryset)
-
-        if filterset.is_valid():
-            queryset = filterset.qs
-            self.applied_filters = {
-                k: int(v) if type(v) in [float, Decimal] else v 
-                for k, v in filterset.form.cleaned_data.items()
-                if v not in [None, '']
-            }
-        else:
-            raise InvalidQueryParamsException()
-            
+        queryset = String.objects.all().order_by('-created_at', '-id')
+        queryset, self.applied_filters = filter_strings(
+            self.request.GET, queryset)
         return queryset
 
-    @extend_schema(**create_string_schema)
+    @document('create_string_schema')
     def post(self, request):
-        serializer = StringSerializer(data=request.data)
+        upsert = parse_bool(request.query_params.get('upsert'))
+        serializer = StringSerializer(
+            data=request.data, context={'upsert': upsert})
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=(
+            status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK))
+
+    def stream(self, queryset, projection):
+        """
+        Stream the queryset as NDJSON, one serialized string per line.
+        Rows are fetched in chunks so the result is never materialized.
+        """
+        chunk_size = getattr(settings, 'STRINGS_STREAM_CHUNK_SIZE', 2000)
+
+        def rows():
+            for row in projection.rows(queryset).iterator(chunk_size=chunk_size):
+                yield dumps(projection.represent(row)) + b'\n'
+
+        return StreamingHttpResponse(
+            rows(), content_type='application/x-ndjson')
+
+    @staticmethod
+    def result_cache_key(params, applied_filters, projection):
+        """
+        Cache key of a list result: the applied filters, projection and page
+        under the current table generation, so any write retires it.
+        """
+        return query_cache_key('list', {
+            'filters': applied_filters,
+            'fields': projection.key,
+            'cursor': params.get('cursor'),
+            'page_size': params.get('page_size'),
+            'include_count': parse_bool(params.get('include_count')),
+            'count_only': parse_bool(params.get('count_only')),
+            'exact': parse_bool(params.get('exact'), default=True),
+        })
 
-    @extend_schema(**get_strings_list_schema)
+    def get_count(self, qs, exact=True):
+        """
+        Number of strings in qs as (count, exact): from the statistics
+        counters when they answer the applied filters (or, unless exact,
+        estimate them), else a COUNT over the filtered set.
+        """
+        with timer('count'):
+            result = StringStatistic.count_filtered(self.applied_filters, exact)
+            if result is None:
+                result = qs.count(), True
+        return result
+
+    def get_result(self, request, qs, projection):
+        params = request.query_params
+        if parse_bool(params.get('count_only')):
+            count, exact = self.get_count(
+                qs, parse_bool(params.get('exact'), default=True))
+            return {
+                'data': [],
+                'count': count,
+                'count_exact': exact,
+                'filters_applied': self.applied_filters
+            }
+
+        paginator = self.pagination_class()
+        if not paginator.is_requested(request):
+            with timer('query'):
+                rows = list(projection.rows(qs))
+            with timer('serialize'):
+                data = [projection.represent(row) for row in rows]
+            # the whole filtered set was fetched: no second scan to count it
+            return {
+                'data': data,
+                'count': len(data),
+                'filters_applied': self.applied_filters
+            }
+
+        with timer('query'):
+            page = paginator.paginate_queryset(projection.rows(qs), request)
+        with timer('serialize'):
+            data = {
+                'data': [projection.represent(row) for row in page],
+                'next_cursor': paginator.next_cursor,
+                'filters_applied': self.applied_filters
+            }
+        # counting the whole filtered set may be a second scan, so it is opt-in
+        if parse_bool(params.get('include_count')):
+            data['count'], data['count_exact'] = self.get_count(
+                qs, parse_bool(params.get('exact'), default=True))
+        return data
+
+    @document('get_strings_list_schema')
     def get(self, request):
-        qs = self.get_queryset()
-        serializers = StringSerializer(qs, many=True)
+        with timer('filter'):
+            qs = self.get_queryset()
+        projection = StringProjection.from_params(request.query_params)
+        if parse_bool(request.query_params.get('stream')):
+            return self.stream(qs, projection)
+
+        key = self.result_cache_key(
+            request.query_params, self.applied_filters, projection)
+        data = self.result_cache.get(key)
+        if data is None:
+            data = self.get_result(request, qs, projection)
+            # sized by rows, so a few huge lists cannot crowd out the rest
+            self.result_cache.set(key, data, size=max(len(data['data']), 1))
+            cache_status = 'MISS'
+        else:
+            cache_status = 'HIT'
+        return Response(
+            data, status=status.HTTP_200_OK, headers={'X-Cache': cache_status})
+
+    def get_delete_ids(self, request):
+        """
+        Ids of the `values` and `hashes` listed in the request body, or None
+        when it lists neither. A value's id is the sha256 hash of its
+        cleaned form.
+        """
+        data = request.data
+        if not isinstance(data, dict) or not ('values' in data or 'hashes' in data):
+            return None
+        values = data.get('values', [])
+        hashes = data.get('hashes', [])
+        for items in (values, hashes):
+            if not isinstance(items, list) or not all(
+                    isinstance(item, str) for item in items):
+                raise MissingValueException(
+                    "'values' and 'hashes' must be arrays of strings")
+        max_size = getattr(settings, 'STRINGS_BATCH_MAX_SIZE', 50000)
+        if len(values) + len(hashes) > max_size:
+            raise BatchTooLargeException(
+                f"Batch contains more than {max_size} strings")
+        # hashed as stored: create strips values before hashing them
+        values = [sha256_hash(clean_value(value)) for value in values]
+        return list({*values, *hashes})
+
+    @document('delete_strings_schema')
+    def delete(self, request):
+        with timer('filter'):
+            qs = self.get_queryset()
+        ids = self.get_delete_ids(request)
+        if ids is not None:
+            qs = qs.filter(id__in=ids)
+        elif not self.applied_filters:
+            raise InvalidQueryParamsException(
+                "Pass filters, values or hashes; refusing to delete every string")
+
+        dry_run = parse_bool(request.query_params.get('dry_run'))
+        if dry_run:
+            with timer('count'):
+                deleted = qs.count()
+        else:
+            with timer('query'):
+                deleted = len(String.delete_many(qs))
         return Response({
-            'data': serializers.data,
-            'count': qs.count(),
-            'filters_applied': self.applied_filters    
+            'deleted': deleted,
+            'dry_run': dry_run,
+            'filters_applied': self.applied_filters
         }, status=status.HTTP_200_OK)
 
 
+@method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
+class BatchCreateStringView(APIView):
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(request, 'limited', False):
+            return JsonResponse({
+                'detail': 'Too many requests.'
+            }, status=429)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_items(self, request):
+        """
+        Accept a JSON array or NDJSON lines of strings or {"value": ...}.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise MissingValueException(
+                "Request body must be a non-empty JSON array or NDJSON lines")
+        max_size = getattr(settings, 'STRINGS_BATCH_MAX_SIZE', 50000)
+        if len(items) > max_size:
+            raise BatchTooLargeException(
+                f"Batch contains more than {max_size} strings")
+        return [
+            item.get('value') if isinstance(item, dict) else item
+            for item in items
+        ]
+
+    @document('batch_create_strings_schema')
+    def post(self, request):
+        results = []
+        pending = {}
+        for index, item in enumerate(self.get_items(request)):
+            try:
+                if isinstance(item, APIException):
+                    raise item
+                value = clean_value(item)
+            except APIException as exc:
+                results.append({
+                    'index': index,
+                    'status': 'invalid',
+                    'detail': exc.detail
+                })
+                continue
+            result = {'index': index, 'value': value}
+            results.append(result)
+            pending.setdefault(value, []).append(result)
+
+        strings = String.create_many(list(pending))
+        # one list serializer reuses its child instead of building one per row
+        created = {
+            data['value']: data
+            for data in StringSerializer(strings, many=True).data
+        }
+        for value, entries in pending.items():
+            data = created.get(value)
+            for i, result in enumerate(entries):
+                if data is not None and i == 0:
+                    result['status'] = 'created'
+                    result['data'] = data
+                else:
+                    result['status'] = 'duplicate'
+                    result['detail'] = DuplicateEntryException.default_detail
+
+        summary = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            summary[result['status']] += 1
+        return Response({
+            'results': results,
+            **summary
+        }, status=status.HTTP_200_OK)
+
+
+@method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
+class StringStatsView(APIView):
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(request, 'limited', False):
+            return JsonResponse({
+                'detail': 'Too many requests.'
+            }, status=429)
+        return super().dispatch(request, *args, **kwargs)
+
+    def histogram(self, counters, metric):
+        return {
+            bucket: n
+            for bucket, n in sorted(
+                (int(bucket), n) for (name, bucket), n in counters.items()
+                if name == metric
+            )
+        }
+
+    @document('get_string_stats_schema')
+    def get(self, request):
+        drift = None
+        if parse_bool(request.query_params.get('recompute')):
+            drift = [
+                {'metric': metric, 'bucket': bucket,
+                 'stored': stored, 'actual': actual}
+                for (metric, bucket), (stored, actual)
+                in sorted(StringStatistic.recompute().items())
+            ]
+
+        counters = StringStatistic.counters()
+        total = counters.get(('total', ''), 0)
+        palindromes = counters.get(('palindromes', ''), 0)
+        data = {
+            'total_strings': total,
+            'palindromes': palindromes,
+            'palindrome_ratio': palindromes / total if total else 0.0,
+            'length_histogram': self.histogram(counters, 'length'),
+            'word_count_histogram': self.histogram(counters, 'word_count'),
+            'character_frequency': dict(sorted(
+                ((bucket, n) for (name, bucket), n in counters.items()
+                 if name == 'character'),
+                key=lambda item: (-item[1], item[0])
+            )),
+        }
+        if drift is not None:
+            data['drift'] = drift
+        return Response(data, status=status.HTTP_200_OK)
+
+
 @method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
 class RetrieveDeleteView(generics.RetrieveDestroyAPIView):
     lookup_field = 'value'
     lookup_url_kwarg = 'string_value'
     serializer_class = StringSerializer
     queryset = String.objects.all()
+    cache_stats = CacheStats('string')
     
     def dispatch(self, request, *args, **kwargs):
         if getattr(request, 'limited', False):
@@ -96,17 +373,42 @@ class RetrieveDeleteView(generics.RetrieveDestroyAPIView):
         except Http404:
             raise NotFound("String does not exist in the system")
         
-    @extend_schema(**get_string_schema)
+    @document('get_string_schema')
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        # the sha256 id is derived from the value, so it doubles as a cache
+        # key and an ETag that can be checked before touching the db
+        string_id = sha256_hash(kwargs[self.lookup_url_kwarg])
+        projection = StringProjection.from_params(request.query_params)
+        etag = string_etag(string_id, projection.key)
+
+        data, token = get_string(string_id)
+        if data is None:
+            self.cache_stats.miss()
+            cache_status = 'MISS'
+        else:
+            self.cache_stats.hit()
+            cache_status = 'HIT'
+        headers = {'ETag': etag, 'X-Cache': cache_status}
+
+        if etag_matches(request, etag):
+            # the client holds the representation: only check it still exists
+            if data is None and not String.objects.filter(id=string_id).exists():
+                raise NotFound("String does not exist in the system")
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if data is None:
+            data = dict(self.get_serializer(self.get_object()).data)
+            set_string(string_id, token, data)
+        # the full representation is cached; projecting it costs no query
+        return Response(projection.project(data), headers=headers)
 
-    @extend_schema(**delete_string_schema)
+    @document('delete_string_schema')
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
 
 @method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
 class NaturalLanguageFilterView(APIView):
+    cache_stats = CacheStats('natural_language')
     
     def dispatch(self, request, *args, **kwargs):
         if getattr(request, 'limited', False):
@@ -117,62 +419,157 @@ class NaturalLanguageFilterView(APIView):
 
     def parse_query(self, query):
         """
-        Simple rule-based parser for natural language queries.
-        Raise ValueError if unable to parse.
+        Parse a natural language query into StringsFilter parameters.
+        See base.query_parser for the supported grammar.
         """
-        
-        filters = {}
-        if 'palindrom' in query:
-            filters['is_palindrome'] = True
-            
-        if 'single word' in query or 'one word' in query:
-            filters['word_count'] = 1
-
-        match = re.search(r"longer than (\d+)", query)
-        if match:
-            filters['min_length'] = int(match.group(1)) + 1
-        
-        match = re.search(r"shorter than (\d+)", query)
-        if match:
-            v = int(match.group(1)) - 1
-            filters['max_length'] = v if v > 0 else 1 
-            
-        if "containing the letter" in query or "contains letter" in query:
-            match = re.search(r"letter (\w)", query)
-            if match:
-                filters['contains_character'] = match.group(1).lower()
-                
-        for k, v in VOWELS.items():
-            if f"{k} vowel" in query:
-                filters['contains_character'] = v
-                break
-
-        if not filters:
-            raise InvalidQueryParamsException("Unable to parse natural language query")
-        
-        if (
-            'min_length' in filters and 'max_length' in filters
-            and filters['min_length'] > filters['max_length']
-        ):
-            raise UnprocessableEntityException("Query parsed but resulted in conflicting filters")
-        
-        return filters
+        return parse_query(query)
     
-    @extend_schema(**get_string_list_natural_language)
+    @document('get_string_list_natural_language')
     def get(self, request):
         query = request.query_params.get('query', '').strip().lower()
         if not query:
             raise InvalidQueryParamsException("Query parameter 'query' is required")
 
-        parsed_filters = self.parse_query(query)
-        queryset = StringsFilter(parsed_filters, String.objects.all()).qs
-        serializers = StringSerializer(queryset, many=True)
+        with timer('parse'):
+            parsed_filters = self.parse_query(query)
+        projection = StringProjection.from_params(request.query_params)
+        # phrasings that parse to the same filters share one cached result
+        cache = caches[RESPONSE_CACHE]
+        prefix = f'nl:{projection.key}' if projection.key else 'nl'
+        key = query_cache_key(prefix, parsed_filters)
+        result = cache.get(key)
+        if result is None:
+            self.cache_stats.miss()
+            with timer('filter'):
+                queryset = StringsFilter(parsed_filters, String.objects.all()).qs
+            with timer('query'):
+                rows = list(projection.rows(queryset))
+            with timer('serialize'):
+                data = [projection.represent(row) for row in rows]
+            result = {
+                'data': data,
+                'count': len(data)
+            }
+            # broad queries would write the whole table into one cache row
+            if len(data) <= settings.STRINGS_NL_CACHE_MAX_ROWS:
+                cache.set(key, result)
+            cache_status = 'MISS'
+        else:
+            self.cache_stats.hit()
+            cache_status = 'HIT'
+
         return Response({
-            'data': serializers.data,
-            'count': queryset.count(),
+            **result,
             'interpreted_query': {
                 'original': query,
                 'parsed_filters': parsed_filters
             }
-        })
-        
\ No newline at end of file
+        }, headers={'X-Cache': cache_status})
+
+
+def metrics_view(request):
+    """
+    Metrics in the Prometheus text format; 404 unless METRICS_ENABLED.
+    """
+    if not metrics.enabled():
+        raise Http404()
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
+class DocumentCreateView(APIView):
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(request, 'limited', False):
+            return JsonResponse({
+                'detail': 'Too many requests.'
+            }, status=429)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_chunks(self, request):
+        """
+        Iterate over the uploaded text: the `file` part of a multipart body,
+        or the raw request body, in DOCUMENTS_CHUNK_SIZE chunks.
+        """
+        chunk_size = settings.DOCUMENTS_CHUNK_SIZE
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise MissingValueException("Missing 'file' in multipart body")
+            return upload.chunks(chunk_size)
+
+        stream = request.stream
+        if stream is None:
+            raise MissingValueException("Request body is empty")
+        return iter(lambda: stream.read(chunk_size), b'')
+
+    def analyze_upload(self, request, content):
+        """
+        Analyze the upload chunk by chunk while copying it into content.
+        """
+        size = 0
+        with StreamAnalyzer() as analyzer:
+            try:
+                for chunk in self.get_chunks(request):
+                    size += len(chunk)
+                    if size > settings.DOCUMENTS_MAX_BYTES:
+                        raise DocumentTooLargeException()
+                    analyzer.update(chunk)
+                    content.write(chunk)
+                analysis = analyzer.result()
+            except UnicodeDecodeError:
+                raise UnprocessableEntityException("Document must be UTF-8 text")
+        if not size:
+            raise MissingValueException("Request body is empty")
+        return size, analysis
+
+    @document('create_document_schema')
+    def post(self, request):
+        with tempfile.TemporaryFile() as content:
+            size, analysis = self.analyze_upload(request, content)
+            document = Document(size=size)
+            document._set_document_details(analysis)
+            if Document.objects.filter(pk=document.id).exists():
+                raise DuplicateEntryException("Document already exists in the system")
+
+            content.seek(0)
+            document.content.save(
+                f'{document.id}.txt', File(content), save=False)
+            try:
+                with transaction.atomic():
+                    document.save(force_insert=True)
+            except IntegrityError:
+                document.content.delete(save=False)
+                raise DuplicateEntryException("Document already exists in the system")
+
+        serializer = DocumentSerializer(document)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(ratelimit(key='ip', rate='50/h', block=False), name='dispatch')
+class DocumentRetrieveDeleteView(generics.RetrieveDestroyAPIView):
+    lookup_url_kwarg = 'document_id'
+    serializer_class = DocumentSerializer
+    queryset = Document.objects.all()
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(request, 'limited', False):
+            return JsonResponse({
+                'detail': 'Too many requests.'
+            }, status=429)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            raise NotFound("Document does not exist in the system")
+
+    @document('get_document_schema')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @document('delete_document_schema')
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the string analyzer.
+
+Each module is runnable on its own, e.g. `python -m benchmarks.analysis`.
+`python -m benchmarks.suite` runs the micro and macro benchmarks and writes
+JSON results that later runs can be compared against; benchmarks.data
+generates the strings they run on.
+"""
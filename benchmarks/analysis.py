@@ -0,0 +1,66 @@
+"""
+Compare the single-pass analysis engine with the previous per-property
+`String._set_*` methods on short, 64-character and multi-kilobyte inputs.
+
+    python -m benchmarks.analysis
+"""
+from collections import Counter
+
+import hashlib
+import random
+import string
+import timeit
+
+from base.analysis import analyze
+
+
+def legacy_analyze(value):
+    """
+    The String._set_* methods and StringSerializer.get_properties Counter
+    as they were before base.analysis.
+    """
+    sha256_hash = hashlib.sha256(value.encode()).hexdigest()
+    length = len(value)
+    is_palindrome = value == value[::-1]
+    unique_characters = len(set([ch for ch in value if ch.isalnum()]))
+    word_count = len(value.split(' '))
+    character_frequency_map = Counter(value)
+    return (
+        sha256_hash, length, is_palindrome,
+        unique_characters, word_count, character_frequency_map
+    )
+
+
+def make_input(size, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '    '
+    return ''.join(rng.choice(alphabet) for _ in range(size))
+
+
+INPUTS = {
+    'short (8)': make_input(8),
+    '64 chars': make_input(64),
+    '4 KiB': make_input(4096),
+    '64 KiB': make_input(65536),
+}
+
+
+def bench(fn, value, repeat=5):
+    number, _ = timeit.Timer(lambda: fn(value)).autorange()
+    best = min(timeit.repeat(lambda: fn(value), number=number, repeat=repeat))
+    return best / number
+
+
+def main():
+    for name, value in INPUTS.items():
+        assert tuple(analyze(value)) == legacy_analyze(value)
+
+    print(f"{'input':<12}{'legacy (us)':>14}{'analyze (us)':>14}{'speedup':>10}")
+    for name, value in INPUTS.items():
+        legacy = bench(legacy_analyze, value) * 1e6
+        current = bench(analyze, value) * 1e6
+        print(f"{name:<12}{legacy:>14.2f}{current:>14.2f}{legacy / current:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Analysis throughput of the inline, thread and process executors on large
+values, with a growing number of pool workers.
+
+Client threads stand in for request threads: each one sends values to the
+executor one at a time, as String.save() does, until every value has been
+analyzed. Analyses per second and MB/s are printed per configuration.
+
+    python -m benchmarks.analysis_executor --length 1000000 --values 64 --clients 16
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import os
+import random
+import string
+import time
+
+from .utils import setup_django
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+
+from base import executors  # noqa: E402
+
+
+def make_values(count, length, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + ' '
+    return [''.join(rng.choices(alphabet, k=length)) for _ in range(count)]
+
+
+def worker_counts(cpus):
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def run(values, clients):
+    executor = executors.get_executor()
+    # start the pool's workers before the clock does
+    executor.analyze_many(values[:1])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(executor.analyze, values))
+    return time.perf_counter() - start
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--length', type=int, default=1000000)
+    parser.add_argument('--values', type=int, default=64)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=worker_counts(cpus))
+    args = parser.parse_args()
+
+    values = make_values(args.values, args.length)
+    megabytes = args.values * args.length / 1e6
+    configs = [('inline', 0)] + [
+        (kind, n) for kind in ('thread', 'process') for n in args.workers]
+
+    print(f"{args.values} values of {args.length} characters, "
+          f"{args.clients} client threads, {cpus} CPUs")
+    print(f"{'executor':<10} {'workers':>7} {'analyses/s':>11} {'MB/s':>8} {'speedup':>8}")
+    baseline = None
+    for kind, workers in configs:
+        with override_settings(
+                ANALYSIS_EXECUTOR=kind, ANALYSIS_WORKERS=workers,
+                ANALYSIS_QUEUE_SIZE=args.clients, ANALYSIS_QUEUE_TIMEOUT=None):
+            # entering and leaving override_settings resets the executor
+            elapsed = run(values, args.clients)
+        baseline = baseline or elapsed
+        print(f"{kind:<10} {workers or '-':>7} {args.values / elapsed:>11.1f} "
+              f"{megabytes / elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Check that concurrent creates of one value cannot both succeed.
+
+Threads are released at once to POST the same value to /strings. Exactly
+one must get a 201 and every other a 409 (or, with --upsert, a 200 carrying
+the same id); any other status, a 500 in particular, fails the check.
+
+    python -m benchmarks.concurrent_create --threads 16 --rounds 20
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+from .utils import setup_django, test_database
+
+
+def hammer(value, threads, upsert):
+    """
+    POST value from every thread at once; return the (status, id) pairs.
+    """
+    from django.db import connection
+    from django.test import Client
+
+    barrier = threading.Barrier(threads)
+    path = '/strings?upsert=true' if upsert else '/strings'
+
+    def post(_):
+        client = Client()
+        barrier.wait()
+        try:
+            response = client.post(
+                path, {'value': value}, content_type='application/json')
+            body = response.json()
+            return response.status_code, body.get('id', body.get('detail'))
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(post, range(threads)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--upsert', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['RATELIMIT_ENABLE'] = 'False'
+    setup_django()
+
+    duplicate = 200 if args.upsert else 409
+    failures = 0
+    totals = Counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        with test_database(os.path.join(tmp, 'concurrent.sqlite3')):
+            for i in range(args.rounds):
+                results = hammer(f'concurrent value {i}', args.threads, args.upsert)
+                statuses = Counter(status for status, _ in results)
+                totals.update(statuses)
+                ids = {detail for status, detail in results if status in (200, 201)}
+                ok = (
+                    statuses[201] == 1
+                    and statuses[duplicate] == args.threads - 1
+                    and (not args.upsert or len(ids) == 1)
+                )
+                if not ok:
+                    failures += 1
+                    print(f"round {i}: {dict(statuses)} {set(results)}", file=sys.stderr)
+
+    print(f"{args.rounds} rounds x {args.threads} threads: "
+          + ', '.join(f"{n} x {status}" for status, n in sorted(totals.items())))
+    if failures:
+        print(f"FAIL: {failures} round(s) with unexpected results", file=sys.stderr)
+        sys.exit(1)
+    print("OK: one create per value")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Reproducible test data: strings of a chosen length, palindrome ratio and
+alphabet, generated from a seed.
+
+    python -m benchmarks.data --count 10000 --length 24 --palindrome-ratio 0.2
+
+seeds the configured database; the other benchmarks call seed_strings()
+against a throwaway test database.
+"""
+import argparse
+import random
+import string
+
+DEFAULT_ALPHABET = string.ascii_lowercase + ' '
+
+
+def generate_values(count, length=16, palindrome_ratio=0.1,
+                    alphabet=DEFAULT_ALPHABET, seed=0):
+    """
+    Return count distinct strings of the given length drawn from alphabet,
+    palindrome_ratio of them palindromes. Spaces never start or end a
+    string, so the values survive the create endpoint's strip().
+    Raise ValueError when the alphabet and length cannot make enough
+    distinct strings.
+    """
+    if not 1 <= length <= 64:
+        raise ValueError("length must be between 1 and 64")
+    edge = alphabet.replace(' ', '')
+    if not edge:
+        raise ValueError("alphabet needs at least one non-space character")
+    rng = random.Random(seed)
+    palindromes = round(count * palindrome_ratio)
+
+    def make(palindrome):
+        half = (length + 1) // 2 if palindrome else length
+        chars = [rng.choice(alphabet) for _ in range(half)]
+        chars[0] = rng.choice(edge)
+        if palindrome:
+            chars = chars + chars[:length // 2][::-1]
+        else:
+            chars[-1] = rng.choice(edge)
+        return ''.join(chars)
+
+    values = {}
+    attempts = 0
+    while len(values) < count:
+        attempts += 1
+        if attempts > count * 20:
+            raise ValueError(
+                f"cannot generate {count} distinct strings of length {length}")
+        palindrome = len(values) < palindromes
+        value = make(palindrome)
+        # a random non-palindrome can still read the same both ways
+        if not palindrome and value == value[::-1]:
+            continue
+        values.setdefault(value, None)
+    values = list(values)
+    rng.shuffle(values)
+    return values
+
+
+def seed_strings(count, **options):
+    """
+    Insert generate_values(count, **options) and return the created strings.
+    """
+    from base.models import String
+
+    return String.create_many(generate_values(count, **options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=16)
+    parser.add_argument('--palindrome-ratio', type=float, default=0.1)
+    parser.add_argument('--alphabet', default=DEFAULT_ALPHABET)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from .utils import setup_django
+    setup_django()
+
+    created = seed_strings(
+        args.count, length=args.length, palindrome_ratio=args.palindrome_ratio,
+        alphabet=args.alphabet, seed=args.seed)
+    print(f"Created {len(created)} strings ({args.count - len(created)} already existed)")
+
+
+if __name__ == '__main__':
+    main()
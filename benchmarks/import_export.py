@@ -0,0 +1,64 @@
+"""
+Round trip of the import_strings and export_strings commands: write
+generated values to an NDJSON file, import it into a throwaway database,
+export everything back and check that the counters did not drift.
+
+    python -m benchmarks.import_export --count 1000000 --workers 4
+"""
+from django.core.management import call_command
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from .data import generate_values
+from .utils import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--length', type=int, default=24)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CACHE_LOCATION'] = os.path.join(tmp, 'cache.sqlite3')
+        setup_django()
+        from base.models import String, StringStatistic
+
+        source = os.path.join(tmp, 'source.ndjson')
+        with open(source, 'w') as f:
+            for value in generate_values(args.count, length=args.length):
+                f.write(json.dumps(value) + '\n')
+
+        with test_database(os.path.join(tmp, 'import.sqlite3')):
+            start = time.perf_counter()
+            call_command(
+                'import_strings', source, '--workers', str(args.workers),
+                '--batch-size', str(args.batch_size), verbosity=0,
+                stdout=io.StringIO())
+            imported = time.perf_counter() - start
+
+            start = time.perf_counter()
+            call_command(
+                'export_strings', os.path.join(tmp, f'export.{args.format}'),
+                stdout=io.StringIO())
+            exported = time.perf_counter() - start
+
+            count = String.objects.count()
+            drift = StringStatistic.recompute()
+
+    print(f"{count} strings, {args.workers} workers")
+    print(f"import  {imported:8.1f}s {count / imported:10.0f} rows/s")
+    print(f"export  {exported:8.1f}s {count / exported:10.0f} rows/s")
+    print(f"counter drift: {len(drift)}")
+
+
+if __name__ == '__main__':
+    main()
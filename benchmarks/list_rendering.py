@@ -0,0 +1,70 @@
+"""
+List response build and encode time: StringSerializer with DRF's
+JSONRenderer against plain dicts from string_rows() encoded by
+renderers.dumps(), with the stdlib encoder and with orjson if installed.
+
+    python -m benchmarks.list_rendering --sizes 1000 10000 100000
+"""
+from unittest import mock
+
+import argparse
+
+from .utils import best_of, setup_django, test_database
+
+setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from base import renderers  # noqa: E402
+from base.models import String  # noqa: E402
+from base.serializers import (  # noqa: E402
+    StringSerializer,
+    represent_string,
+    string_rows
+)
+
+
+def drf(queryset):
+    data = StringSerializer(queryset.all(), many=True).data
+    return JSONRenderer().render({'data': data})
+
+
+def fast(queryset):
+    data = [represent_string(row) for row in string_rows(queryset.all())]
+    return renderers.dumps({'data': data})
+
+
+def fast_stdlib(queryset):
+    with mock.patch.object(renderers, 'orjson', None):
+        return fast(queryset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    columns = [('drf', drf), ('stdlib', fast_stdlib)]
+    if renderers.orjson is not None:
+        columns.append(('orjson', fast))
+
+    with test_database():
+        print(f"{'rows':>8}" + ''.join(f"{name + ' (ms)':>15}" for name, _ in columns)
+              + f"{'speedup':>10}")
+        created = 0
+        for size in sorted(args.sizes):
+            String.create_many(
+                f"benchmark string number {i} with some words"
+                for i in range(created, size)
+            )
+            created = size
+            queryset = String.objects.order_by('-created_at', '-id')
+            times = [best_of(lambda: fn(queryset), repeat=args.repeat)
+                     for _, fn in columns]
+            print(f"{size:>8}" + ''.join(f"{t * 1e3:>15.1f}" for t in times)
+                  + f"{times[0] / min(times[1:]):>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
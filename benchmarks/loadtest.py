@@ -0,0 +1,139 @@
+"""
+Compare latency and throughput of the string endpoints under WSGI and ASGI.
+
+Start the same project under both servers against one database, with rate
+limiting off so the load is not turned away, then point this script at them:
+
+    RATELIMIT_ENABLE=False gunicorn analyzer.wsgi -w 4 -b 127.0.0.1:8000
+    RATELIMIT_ENABLE=False uvicorn analyzer.asgi:application --workers 4 --port 8001
+    python -m benchmarks.loadtest --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001
+
+The WSGI server is sent the sync views and the ASGI server the async views
+under /async (change it with --asgi-prefix; an empty prefix measures the
+sync views behind the ASGI thread adapter). Each endpoint gets the same
+number of requests from a pool of client threads, and p50/p99 latency and
+requests per second are printed per server and endpoint.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+import argparse
+import http.client
+import json
+import random
+import string
+import threading
+import time
+
+ENDPOINTS = {
+    'list': '/strings?page_size=50',
+    'filter': '/strings?is_palindrome=false&min_length=5&page_size=50',
+    'retrieve': '/strings/{value}',
+    'natural language': '/strings/filter-by-natural-language?query=single%20word%20palindromes',
+}
+
+
+def random_value(rng):
+    words = rng.randint(1, 4)
+    return ' '.join(
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+        for _ in range(words)
+    )
+
+
+class Client(threading.local):
+    """
+    One keep-alive connection per client thread.
+    """
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {'Content-Type': 'application/json'} if body else {}
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = None
+            raise
+        return response.status
+
+
+def seed(base_url, count, rng):
+    """
+    Insert count random strings and return one of them to retrieve.
+    """
+    values = [random_value(rng) for _ in range(count)]
+    status = Client(base_url).request(
+        'POST', '/strings/batch', json.dumps(values))
+    if status != 200:
+        raise SystemExit(f"Seeding {base_url} failed with HTTP {status}")
+    return values[0]
+
+
+def run(client, path, requests, concurrency):
+    """
+    Send requests GETs to path and return (latencies, errors, elapsed).
+    """
+    def one(_):
+        start = time.perf_counter()
+        try:
+            ok = client.request('GET', path) < 400
+        except (http.client.HTTPException, OSError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, ok in results if ok)
+    return latencies, len(results) - len(latencies), elapsed
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--wsgi', required=True, help='base URL of the WSGI server')
+    parser.add_argument('--asgi', required=True, help='base URL of the ASGI server')
+    parser.add_argument('--asgi-prefix', default='/async')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=1000,
+                        help='strings to insert first (0 to skip)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    value = seed(args.wsgi, args.seed, rng) if args.seed else 'racecar'
+    targets = [('wsgi', args.wsgi, ''), ('asgi', args.asgi, args.asgi_prefix)]
+
+    print(f"{args.requests} requests per endpoint, {args.concurrency} clients")
+    print(f"{'server':<6} {'endpoint':<18} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'req/s':>8} {'errors':>7}")
+    for name, base_url, prefix in targets:
+        client = Client(base_url)
+        for endpoint, path in ENDPOINTS.items():
+            path = prefix + path.format(value=quote(value))
+            # warm up connections and caches before measuring
+            run(client, path, args.concurrency, args.concurrency)
+            latencies, errors, elapsed = run(
+                client, path, args.requests, args.concurrency)
+            print(f"{name:<6} {endpoint:<18} "
+                  f"{percentile(latencies, 50) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} "
+                  f"{args.requests / elapsed:>8.0f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
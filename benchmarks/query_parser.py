@@ -0,0 +1,172 @@
+"""
+Parse throughput of base.query_parser against the previous substring and
+regex checks in NaturalLanguageFilterView.parse_query, on a generated
+corpus of natural language queries. Negated phrases, which the old checks
+ignored, and non-ASCII letters are first checked against their expected
+filters.
+
+    python -m benchmarks.query_parser --queries 3000
+"""
+from .utils import setup_django
+
+setup_django()
+
+import argparse  # noqa: E402
+import random  # noqa: E402
+import re  # noqa: E402
+import time  # noqa: E402
+
+from base.exceptions import (  # noqa: E402
+    InvalidQueryParamsException,
+    UnprocessableEntityException
+)
+from base.query_parser import _parse_normalized, normalize, parse_query  # noqa: E402
+from rest_framework.exceptions import APIException  # noqa: E402
+
+LEGACY_VOWELS = {
+    'first': 'a',
+    'second': 'e',
+    'third': 'i',
+    'fourth': 'o',
+    'fifth': 'u'
+}
+
+
+def legacy_parse_query(query):
+    """
+    NaturalLanguageFilterView.parse_query before base.query_parser.
+    """
+    filters = {}
+    if 'palindrom' in query:
+        filters['is_palindrome'] = True
+
+    if 'single word' in query or 'one word' in query:
+        filters['word_count'] = 1
+
+    match = re.search(r"longer than (\d+)", query)
+    if match:
+        filters['min_length'] = int(match.group(1)) + 1
+
+    match = re.search(r"shorter than (\d+)", query)
+    if match:
+        v = int(match.group(1)) - 1
+        filters['max_length'] = v if v > 0 else 1
+
+    if "containing the letter" in query or "contains letter" in query:
+        match = re.search(r"letter (\w)", query)
+        if match:
+            filters['contains_character'] = match.group(1).lower()
+
+    for k, v in LEGACY_VOWELS.items():
+        if f"{k} vowel" in query:
+            filters['contains_character'] = v
+            break
+
+    if not filters:
+        raise InvalidQueryParamsException("Unable to parse natural language query")
+
+    if (
+        'min_length' in filters and 'max_length' in filters
+        and filters['min_length'] > filters['max_length']
+    ):
+        raise UnprocessableEntityException("Query parsed but resulted in conflicting filters")
+
+    return filters
+
+
+TEMPLATES = [
+    "all single word palindromic strings",
+    "strings longer than {n} characters",
+    "strings shorter than {n} characters",
+    "palindromic strings that contain the {ordinal} vowel",
+    "strings containing the letter {c}",
+    "single word palindromes longer than {n}",
+    "strings longer than {n} and shorter than {m}",
+    "one word strings containing the letter {c}",
+    "Palindromes   shorter than {m}",
+]
+
+# negations bind to the next clause only, letters need not be ASCII;
+# None marks a rejected query
+CHECKED_QUERIES = {
+    "strings that are not palindromes": {'is_palindrome': False},
+    "strings not longer than 5 characters": {'max_length': 5},
+    "strings not containing the letter a": {'excludes_characters': 'a'},
+    "non-empty palindromes": {'is_palindrome': True},
+    "no spaces, palindromes only": {'is_palindrome': True},
+    "strings that do not have spaces and are palindromes": {'is_palindrome': True},
+    "strings that are not one word": None,
+    "not 3 words long": None,
+    "not exactly 5 characters": None,
+    "not between 2 and 4 words": None,
+    "strings containing the letter é": {'contains_character': 'é'},
+}
+
+
+def check_queries():
+    """
+    Queries of CHECKED_QUERIES that do not parse as expected, with what
+    they parsed to.
+    """
+    mismatches = {}
+    for query, expected in CHECKED_QUERIES.items():
+        try:
+            parsed = parse_query(query)
+        except UnprocessableEntityException:
+            parsed = None
+        if parsed != expected:
+            mismatches[query] = parsed
+    return mismatches
+
+
+def make_corpus(size, seed=0):
+    rng = random.Random(seed)
+    ordinals = list(LEGACY_VOWELS)
+    return [
+        rng.choice(TEMPLATES + list(CHECKED_QUERIES)).format(
+            n=rng.randint(1, 30), m=rng.randint(31, 64),
+            c=rng.choice('abcdefghijklmnopqrstuvwxyz'),
+            ordinal=rng.choice(ordinals))
+        for _ in range(size)
+    ]
+
+
+def throughput(parse, corpus):
+    start = time.perf_counter()
+    for query in corpus:
+        try:
+            parse(query)
+        except APIException:
+            pass
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--queries', type=int, default=3000)
+    args = parser.parse_args()
+
+    mismatches = check_queries()
+    for query, parsed in mismatches.items():
+        print(f"unexpected parse: {query!r} -> {parsed}")
+    if mismatches:
+        raise SystemExit(1)
+
+    corpus = make_corpus(args.queries)
+    print(f"{len(corpus)} queries, {len(set(map(normalize, corpus)))} distinct")
+
+    # the view lowercases and strips before calling the legacy parser
+    legacy = throughput(lambda q: legacy_parse_query(q.strip().lower()), corpus)
+    uncached = throughput(
+        lambda q: _parse_normalized.__wrapped__(normalize(q)), corpus)
+    _parse_normalized.cache_clear()
+    throughput(parse_query, corpus)
+    cached = throughput(parse_query, corpus)
+
+    print(f"{'legacy parse_query':<28}{legacy:>12,.0f} queries/s")
+    print(f"{'query_parser, uncached':<28}{uncached:>12,.0f} queries/s")
+    print(f"{'query_parser, LRU warm':<28}{cached:>12,.0f} queries/s")
+
+
+if __name__ == '__main__':
+    main()
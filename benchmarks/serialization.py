@@ -0,0 +1,96 @@
+"""
+Serialization time (row fetch plus representation) with the stored
+character_frequency_map against recomputing a Counter for every row, as
+StringSerializer did before, for values of growing length. Both the
+StringSerializer path (retrieve, create) and the values_list path of the
+list endpoints are timed.
+
+    python -m benchmarks.serialization --rows 1000 --lengths 64 1024 16384
+"""
+from collections import Counter
+
+import argparse
+import random
+import string
+
+from .utils import best_of, setup_django, test_database
+
+setup_django()
+
+from base.models import String  # noqa: E402
+from base.serializers import StringSerializer, represent_string, string_rows  # noqa: E402
+
+
+class CounterStringSerializer(StringSerializer):
+    """
+    StringSerializer before the frequency map was persisted.
+    """
+    def get_properties(self, obj):
+        return {
+            'length': obj.length,
+            'is_palindrome': obj.is_palindrome,
+            'unique_characters': obj.unique_characters,
+            'word_count': obj.word_count,
+            'sha256_hash': obj.id,
+            'character_frequency_map': Counter(obj.value)
+        }
+
+
+def counter_list(queryset):
+    """
+    The list path with the map rebuilt from the value instead of read.
+    """
+    rows = queryset.values_list(
+        'id', 'value', 'length', 'is_palindrome', 'unique_characters',
+        'word_count', 'created_at', named=True)
+    return [
+        represent_string((
+            row.id, row.value, row.length, row.is_palindrome,
+            row.unique_characters, row.word_count, dict(Counter(row.value)),
+            row.created_at))
+        for row in rows
+    ]
+
+
+def stored_list(queryset):
+    return [represent_string(row) for row in string_rows(queryset)]
+
+
+def make_values(count, length, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + ' '
+    return [
+        f"{i} " + ''.join(rng.choices(alphabet, k=length))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[64, 1024, 16384])
+    args = parser.parse_args()
+
+    cases = {
+        'serializer': (
+            lambda qs: CounterStringSerializer(
+                qs.defer('character_frequency_map'), many=True).data,
+            lambda qs: StringSerializer(qs, many=True).data),
+        'list rows': (counter_list, stored_list),
+    }
+    with test_database():
+        print(f"{args.rows} rows")
+        print(f"{'path':<12}{'length':>8}{'counter (ms)':>15}{'stored (ms)':>14}"
+              f"{'speedup':>10}")
+        for length in args.lengths:
+            String.objects.all().delete()
+            String.create_many(make_values(args.rows, length))
+            for name, (counter, stored) in cases.items():
+                before = best_of(lambda: counter(String.objects.all()))
+                after = best_of(lambda: stored(String.objects.all()))
+                print(f"{name:<12}{length:>8}{before * 1e3:>15.1f}"
+                      f"{after * 1e3:>14.1f}{before / after:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Check that the rate limit is enforced across worker processes.
+
+Several processes hit the same ratelimited key at once through the shared
+SQLite cache; the number of allowed requests must equal the limit, not
+limit x processes. Exits non-zero when the limit leaks.
+
+    python -m benchmarks.shared_cache --processes 8 --requests 40
+"""
+from multiprocessing import Pool
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RATE = '50/h'
+LIMIT = 50
+
+
+def hit(args):
+    location, requests = args
+    os.environ['CACHE_LOCATION'] = location
+    from .utils import setup_django
+    setup_django()
+
+    from django.test import RequestFactory
+    from django_ratelimit.core import is_ratelimited
+
+    request = RequestFactory().get('/strings', REMOTE_ADDR='10.0.0.1')
+    allowed = 0
+    for _ in range(requests):
+        limited = is_ratelimited(
+            request, group='shared-cache-check', key='ip', rate=RATE,
+            increment=True)
+        allowed += not limited
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        location = os.path.join(tmp, 'cache.sqlite3')
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            allowed = sum(pool.map(
+                hit, [(location, args.requests)] * args.processes))
+        elapsed = time.perf_counter() - start
+
+    total = args.processes * args.requests
+    expected = min(LIMIT, total)
+    print(f"{args.processes} processes x {args.requests} requests: "
+          f"{allowed} allowed, limit {LIMIT} ({elapsed:.2f}s)")
+    if allowed != expected:
+        print(f"FAIL: expected {expected} allowed requests", file=sys.stderr)
+        sys.exit(1)
+    print("OK: limit enforced across processes")
+
+
+if __name__ == '__main__':
+    main()
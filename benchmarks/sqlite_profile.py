@@ -0,0 +1,111 @@
+"""
+Compare write and read throughput of the SQLite database profiles.
+
+Each profile runs in its own process, since settings are read at startup,
+against a fresh database file. Writer threads create strings while reader
+threads run filtered list queries, each operation ending like a request
+does (close_old_connections), for a fixed duration. Operations per second
+and "database is locked" errors are printed per profile.
+
+    python -m benchmarks.sqlite_profile --writers 4 --readers 8 --seconds 10
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from .utils import setup_django, test_database
+
+PROFILES = ['default', 'concurrent']
+
+
+def work(seconds, writers, readers):
+    from django.db import OperationalError, close_old_connections
+
+    from base.filters import StringsFilter
+    from base.models import String
+
+    deadline = time.perf_counter() + seconds
+    prefix = uuid.uuid4().hex[:8]
+
+    def write(n):
+        String.objects.create(value=f'{prefix} {n} {uuid.uuid4().hex[:16]}')
+
+    def read(n):
+        params = {'min_length': n % 20, 'contains_character': 'abcdef'[n % 6]}
+        queryset = String.objects.order_by('-created_at', '-id')
+        list(StringsFilter(params, queryset=queryset).qs[:50])
+
+    def loop(op):
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                op(done)
+                done += 1
+            except OperationalError:
+                errors += 1
+            finally:
+                # end of "request": closes the connection unless CONN_MAX_AGE
+                close_old_connections()
+        return done, errors
+
+    with ThreadPoolExecutor(writers + readers) as pool:
+        futures = (
+            [('write', pool.submit(loop, write)) for _ in range(writers)]
+            + [('read', pool.submit(loop, read)) for _ in range(readers)]
+        )
+        totals = {'write': [0, 0], 'read': [0, 0]}
+        for kind, future in futures:
+            done, errors = future.result()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+    return {
+        kind: {'ops': done / seconds, 'errors': errors}
+        for kind, (done, errors) in totals.items()
+    }
+
+
+def worker(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CACHE_LOCATION'] = os.path.join(tmp, 'cache.sqlite3')
+        setup_django()
+        with test_database(os.path.join(tmp, 'profile.sqlite3')):
+            result = work(args.seconds, args.writers, args.readers)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s")
+    print(f"{'profile':<12} {'writes/s':>9} {'reads/s':>9} {'locked':>7}")
+    for profile in PROFILES:
+        env = dict(os.environ, DATABASE_PROFILE=profile, RATELIMIT_ENABLE='False')
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_profile', '--worker',
+             '--writers', str(args.writers), '--readers', str(args.readers),
+             '--seconds', str(args.seconds)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        errors = result['write']['errors'] + result['read']['errors']
+        print(f"{profile:<12} {result['write']['ops']:>9.0f} "
+              f"{result['read']['ops']:>9.0f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
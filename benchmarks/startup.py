@@ -0,0 +1,92 @@
+"""
+Cold start of a worker: the time to import the WSGI application and its
+URLconf, then the latency of the first and second request to an endpoint
+and to the OpenAPI schema. Each run is a fresh interpreter, as a newly
+spawned worker would be; the best and median of the runs are printed.
+
+    python -m benchmarks.startup --runs 5
+    API_DOCS_ENABLED=False python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# runs in the child interpreter; the import clock starts before Django does
+CHILD = r'''
+import time
+start = time.perf_counter()
+
+import os, sys, json
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'analyzer.settings')
+from analyzer.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+imported = time.perf_counter() - start
+modules = len(sys.modules)
+docs_loaded = 'drf_spectacular.views' in sys.modules
+
+from django.conf import settings
+from django.test import Client
+from benchmarks.utils import test_database
+
+def timed(client, path):
+    start = time.perf_counter()
+    response = client.get(path)
+    assert response.status_code in (200, 404), (path, response.status_code)
+    return time.perf_counter() - start
+
+with test_database():
+    client = Client()
+    path = sys.argv[1]
+    result = {
+        'import': imported,
+        'first request': timed(client, path),
+        'second request': timed(client, path),
+    }
+    if settings.API_DOCS_ENABLED:
+        result['first schema'] = timed(client, '/schema')
+        result['second schema'] = timed(client, '/schema')
+    result['modules'] = modules
+    result['docs loaded at import'] = docs_loaded
+print(json.dumps(result))
+'''
+
+
+def run_child(path, env):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, path], env=env, check=True,
+        capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/strings?page_size=50&include_count=true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'CACHE_LOCATION': os.path.join(tmp, 'cache.sqlite3'),
+            'RATELIMIT_ENABLE': 'False',
+            'PYTHONPATH': os.getcwd(),
+        }
+        runs = [run_child(args.path, env) for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, first request to {args.path}")
+    print(f"modules imported: {runs[0]['modules']}, "
+          f"drf_spectacular loaded at import: {runs[0]['docs loaded at import']}")
+    print(f"{'stage':<16} {'best ms':>9} {'median ms':>10}")
+    for stage, value in runs[0].items():
+        if isinstance(value, float):
+            timings = [run[stage] * 1000 for run in runs]
+            print(f"{stage:<16} {min(timings):>9.1f} {statistics.median(timings):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark suite: micro-benchmarks of the analysis and parsing hot paths and
+macro-benchmarks of the string endpoints, written out as JSON.
+
+Micro-benchmarks time String._set_string_details, StringSerializer
+.get_properties and NaturalLanguageFilterView.parse_query (memoized and
+cold). Macro-benchmarks seed a test database to each table size with
+benchmarks.data and drive the endpoints through Django's test client with
+rate limiting off; "cold" cases clear the response cache (the list result
+cache for list cases) on every request.
+
+    python -m benchmarks.suite --sizes 1000 10000 --output after.json
+    python -m benchmarks.suite --baseline before.json --tolerance 0.2
+
+With --baseline, every timing more than `tolerance` slower than the same
+timing in the baseline is reported and the exit status is non-zero.
+"""
+from urllib.parse import quote
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from .utils import setup_django, test_database
+
+os.environ.setdefault(
+    'CACHE_LOCATION', os.path.join(tempfile.mkdtemp(), 'cache.sqlite3'))
+setup_django()
+
+import django  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from base.cache import RESPONSE_CACHE  # noqa: E402
+from base.models import String  # noqa: E402
+from base.query_parser import _parse_normalized  # noqa: E402
+from base.serializers import StringSerializer  # noqa: E402
+from base.views import ListCreateStringView, NaturalLanguageFilterView  # noqa: E402
+
+from .data import generate_values  # noqa: E402
+
+NL_QUERIES = [
+    'all single word palindromic strings',
+    'strings longer than 10 characters containing the letter z',
+    'palindromes between 5 and 12 characters',
+    'strings with at least 2 words that do not contain the letters x or q',
+]
+
+
+def timing(fn, repeat=5):
+    """
+    Best seconds per call of fn, over `repeat` auto-ranged runs.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def request_timing(client, path, repeat=5, number=20, before=None):
+    """
+    Best seconds per GET of path, failing on any non-200 response.
+    """
+    def run():
+        if before is not None:
+            before()
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+    run()  # warm up imports, connections and caches
+    return min(timeit.repeat(run, repeat=repeat, number=number)) / number
+
+
+def micro(repeat):
+    value = generate_values(1, length=64, seed=1)[0]
+    view = NaturalLanguageFilterView()
+    serializer = StringSerializer()
+    obj = String(value=value)
+    obj._set_string_details()
+
+    def parse_cold():
+        _parse_normalized.cache_clear()
+        for query in NL_QUERIES:
+            view.parse_query(query)
+
+    def parse_warm():
+        for query in NL_QUERIES:
+            view.parse_query(query)
+
+    return {
+        'String._set_string_details': timing(
+            lambda: String(value=value)._set_string_details(), repeat),
+        'StringSerializer.get_properties': timing(
+            lambda: serializer.get_properties(obj), repeat),
+        'NaturalLanguageFilterView.parse_query (cold)':
+            timing(parse_cold, repeat) / len(NL_QUERIES),
+        'NaturalLanguageFilterView.parse_query (memoized)':
+            timing(parse_warm, repeat) / len(NL_QUERIES),
+    }
+
+
+def macro(sizes, repeat, number, length, palindrome_ratio):
+    client = Client()
+    cache = caches[RESPONSE_CACHE]
+    list_cache = ListCreateStringView.result_cache
+    results = {}
+    values = generate_values(
+        max(sizes), length=length, palindrome_ratio=palindrome_ratio)
+    created = 0
+    for size in sorted(sizes):
+        String.create_many(values[created:size])
+        created = size
+        target = quote(values[size // 2])
+        nl_query = quote(NL_QUERIES[0])
+        cases = {
+            'GET /strings?is_palindrome=true&min_length=5':
+                ('/strings?is_palindrome=true&min_length=5', None),
+            'GET /strings?is_palindrome=true&min_length=5 (cold)':
+                ('/strings?is_palindrome=true&min_length=5', list_cache.clear),
+            'GET /strings?page_size=50':
+                ('/strings?page_size=50', None),
+            'GET /strings?page_size=50 (cold)':
+                ('/strings?page_size=50', list_cache.clear),
+            'GET /strings?contains_character=z&page_size=50':
+                ('/strings?contains_character=z&page_size=50', None),
+            'GET /strings?contains_character=z&page_size=50 (cold)':
+                ('/strings?contains_character=z&page_size=50', list_cache.clear),
+            'GET /strings?count_only=true&is_palindrome=true&min_length=5 (cold)':
+                ('/strings?count_only=true&is_palindrome=true&min_length=5',
+                 list_cache.clear),
+            'GET /strings?count_only=true&contains_character=z&word_count=1&exact=false (cold)':
+                ('/strings?count_only=true&contains_character=z&word_count=1&exact=false',
+                 list_cache.clear),
+            'GET /strings?page_size=50&include_count=true (cold)':
+                ('/strings?page_size=50&include_count=true', list_cache.clear),
+            'GET /strings/{value}':
+                (f'/strings/{target}', None),
+            'GET /strings/{value} (cold)':
+                (f'/strings/{target}', cache.clear),
+            'GET /strings/filter-by-natural-language':
+                (f'/strings/filter-by-natural-language?query={nl_query}', None),
+            'GET /strings/filter-by-natural-language (cold)':
+                (f'/strings/filter-by-natural-language?query={nl_query}', cache.clear),
+        }
+        results[str(size)] = {
+            name: request_timing(client, path, repeat, number, before)
+            for name, (path, before) in cases.items()
+        }
+        print(f"  {size} rows done", file=sys.stderr)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=''):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f'{prefix}{key} / ')
+        else:
+            yield f'{prefix}{key}', value
+
+
+def compare(results, baseline, tolerance):
+    """
+    Timings more than tolerance slower than in baseline, as
+    [(name, baseline seconds, new seconds)].
+    """
+    old = dict(flatten({'micro': baseline['micro'], 'macro': baseline['macro']}))
+    new = dict(flatten({'micro': results['micro'], 'macro': results['macro']}))
+    return [
+        (name, old[name], seconds)
+        for name, seconds in new.items()
+        if name in old and seconds > old[name] * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--length', type=int, default=24)
+    parser.add_argument('--palindrome-ratio', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=20,
+                        help='requests per timing run of a macro case')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'options': {
+                'sizes': args.sizes,
+                'length': args.length,
+                'palindrome_ratio': args.palindrome_ratio,
+                'repeat': args.repeat,
+                'requests': args.requests,
+            },
+        },
+        'unit': 'seconds per call',
+    }
+    print("micro-benchmarks", file=sys.stderr)
+    results['micro'] = micro(args.repeat)
+    print("macro-benchmarks", file=sys.stderr)
+    with override_settings(RATELIMIT_ENABLE=False), test_database():
+        results['macro'] = macro(
+            args.sizes, args.repeat, args.requests, args.length,
+            args.palindrome_ratio)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1e6:.1f}us -> "
+                  f"{after * 1e6:.1f}us ({after / before:.2f}x)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
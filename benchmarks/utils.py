@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+import os
+import timeit
+
+
+def setup_django():
+    """
+    Configure Django the same way manage.py does.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'analyzer.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """
+    Run the body against a throwaway test database instead of db.sqlite3.
+    Pass a file name when several threads must share it: SQLite test
+    databases are in memory by default.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def best_of(fn, repeat=5, number=1):
+    """
+    Best wall time of fn in seconds over `repeat` runs of `number` calls.
+    """
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number